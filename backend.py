@@ -1,32 +1,29 @@
-import os
-from dotenv import load_dotenv
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import quote
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from collections import deque
+from functools import lru_cache
+import threading
+from urllib.parse import quote, urlsplit
 import json
-from google import genai
-import pandas as pd
-import plotly.express as px
-from collections import Counter
-import sqlite3
+from config import get_setting
+from db import get_conn
+from cache import skill_cache, sql_plan_cache
+from llm import generate_content, estimate_tokens, GEMINI_MODEL
+from skill_matcher import get_skill_matcher, EXTRACTION_MODE, EXTRACTION_MODES, LOCAL_MIN_HARD_SKILLS
+from ratelimit import GEMINI_MAX_IN_FLIGHT, scrape_politeness
+from rollups import get_or_create_search, find_search, add_search_jobs, search_skill_payload
 import re
-import pandas as pd
-import streamlit as st
-import nltk, os
-nltk.data.path.append(os.path.join(os.getcwd(), "nltk_data"))
+from textnorm import normalize, STOP_WORDS
+from htmlparse import parse_listing_page, parse_job_description
+from intents import route_question
+from chat_sql import bounded_query, scalar_answer, result_digest, QueryRejected
+from sessions import start_run, add_run_jobs, attach_search
+from metrics import inc, span
 
-
-# # Ensure necessary NLTK resources are downloaded
-# nltk.download('punkt')
-# nltk.download('stopwords')
-
-load_dotenv()
-# GEM_KEY = os.environ.get("GEM_KEY") LOCALLY!
-GEM_KEY = st.secrets["GEM_KEY"]
-client = genai.Client(api_key=GEM_KEY)
+# pandas, plotly, BeautifulSoup, jsonschema and google.genai are imported where they are first
+# used (and the Gemini client is built on first call, see llm.py) so importing this module,
+# e.g. from the FastAPI server, stays fast. benchmarks/bench_import.py guards this.
 
 remote_mapping = {"Onsite": "1", "Remote": "2", "Hybrid": "3"}
 experience_mapping = {
@@ -50,42 +47,78 @@ benefits_mapping = {
     "Tuition assistance": "10",
     "Disability insurance": "11"
 }
+JOB_SEARCH_URL = "https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search"
+
 sortby_mapping = {"Relevance": "r", "Date Posted": "DD"}
 date_posted_mapping = {"Past 24 hours": "r86400", "Past week": "r604800", "Past month": "r2592000"}
 
-conn = sqlite3.connect(':memory:', check_same_thread=False)
-cur = conn.cursor()
-
-def create_jobs_table():
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS jobs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            job_title TEXT,
-            company TEXT,
-            location TEXT,
-            job_url TEXT,
-            job_description TEXT,
-            experience_level TEXT,
-            remote TEXT,
-            benefits TEXT,
-            easy_apply INTEGER,
-            date_posted TEXT,
-            sortby TEXT,
-            extracted_hard_skills TEXT,
-            extracted_soft_skills TEXT,
-            hard_skills_count INTEGER,
-            soft_skills_count INTEGER
-        )
-    """)
-    conn.commit()
+DEFAULT_HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                   "AppleWebKit/537.36 (KHTML, like Gecko) "
+                   "Chrome/91.0.4472.124 Safari/537.36")
+}
+
+# Batched extraction prompts are packed by estimated tokens rather than job count; the item
+# cap keeps each JSON response well inside gemini-2.0-flash's output limit.
+BATCH_TOKEN_BUDGET = int(get_setting("BATCH_TOKEN_BUDGET", "30000"))
+BATCH_MAX_ITEMS = int(get_setting("BATCH_MAX_ITEMS", "25"))
+MAX_DESCRIPTION_TOKENS = 3000
+
+# Bump these whenever the extraction prompts change so cached results are not reused.
+EXTRACT_PROMPT_VERSION = "skills-single-v1"
+BATCH_PROMPT_VERSION = "skills-batch-v2"
+
+# Description fetches share one keep-alive session; the connection pool is sized
+# to the largest concurrency limit we allow so workers never open throwaway sockets.
+DESCRIPTION_FETCH_WORKERS = int(get_setting("DESCRIPTION_FETCH_WORKERS", "8"))
+MAX_FETCH_WORKERS = 32
+REQUEST_TIMEOUT = 15
+
+_http_sessions = {}
+_http_session_lock = threading.Lock()
+
+class PoliteSession(requests.Session):
+    # Every request waits for its host's slot in `politeness` (see ratelimit.HostPoliteness).
+    def __init__(self, politeness):
+        super().__init__()
+        self.politeness = politeness
+
+    def request(self, method, url, *args, **kwargs):
+        with self.politeness.slot(urlsplit(url).netloc):
+            return super().request(method, url, *args, **kwargs)
+
+def get_http_session(polite=False) -> requests.Session:
+    # Interactive runs share one pooled session; background refreshes share a polite one.
+    with _http_session_lock:
+        if polite not in _http_sessions:
+            session = PoliteSession(scrape_politeness) if polite else requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_FETCH_WORKERS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_sessions[polite] = session
+    return _http_sessions[polite]
 
 def insert_jobs(jobs, experience_level, remote, benefits, easy_apply, sortby, date_posted):
+    # Upsert on job_url: a posting we already hold keeps its row id, description and skills.
+    conn = get_conn()
+    cur = conn.cursor()
     for job in jobs:
         cur.execute("""
             INSERT INTO jobs (
                 job_title, company, location, job_url, job_description,
                 experience_level, remote, benefits, easy_apply, date_posted, sortby
             ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(job_url) DO UPDATE SET
+                job_title = excluded.job_title,
+                company = excluded.company,
+                location = excluded.location,
+                job_description = COALESCE(NULLIF(excluded.job_description, ''), jobs.job_description),
+                experience_level = excluded.experience_level,
+                remote = excluded.remote,
+                benefits = excluded.benefits,
+                easy_apply = excluded.easy_apply,
+                date_posted = excluded.date_posted,
+                sortby = excluded.sortby
         """, (
             job.get("title"),
             job.get("company"),
@@ -99,15 +132,45 @@ def insert_jobs(jobs, experience_level, remote, benefits, easy_apply, sortby, da
             date_posted,
             sortby
         ))
-        job["db_id"] = cur.lastrowid
+        if job.get("url"):
+            job["db_id"] = cur.execute("SELECT id FROM jobs WHERE job_url = ?", (job["url"],)).fetchone()[0]
+        else:
+            job["db_id"] = cur.lastrowid
     conn.commit()
 
+def get_stored_jobs(job_urls) -> dict:
+    """Map each already-stored job URL to its description and (if extracted) skills."""
+    job_urls = [url for url in job_urls if url]
+    if not job_urls:
+        return {}
+    placeholders = ",".join("?" for _ in job_urls)
+    rows = get_conn().execute(f"""
+        SELECT id, job_url, job_description, extracted_hard_skills, extracted_soft_skills
+        FROM jobs WHERE job_url IN ({placeholders})
+    """, job_urls).fetchall()
+    stored = {}
+    for db_id, job_url, description, hard, soft in rows:
+        entry = {"db_id": db_id, "description": description or ""}
+        if hard is not None:
+            entry["extracted_skills"] = {
+                "hard_skills": json.loads(hard),
+                "soft_skills": json.loads(soft) if soft else [],
+            }
+        stored[job_url] = entry
+    return stored
+
+SKILL_KINDS = ("hard", "soft")
+
+def normalize_skill_name(skill: str) -> str:
+    return " ".join(str(skill).split()).lower()
+
 def update_job_skills(job, extracted_skills):
     hard_skills = extracted_skills.get("hard_skills", [])
     soft_skills = extracted_skills.get("soft_skills", [])
     hard_count = len(hard_skills)
     soft_count = len(soft_skills)
-    cur.execute("""
+    conn = get_conn()
+    conn.execute("""
         UPDATE jobs
         SET extracted_hard_skills = ?,
             extracted_soft_skills = ?,
@@ -121,33 +184,55 @@ def update_job_skills(job, extracted_skills):
         soft_count,
         job["db_id"]
     ))
+    # Replace the job's normalized skill rows in the same transaction as the JSON columns.
+    conn.execute("DELETE FROM job_skills WHERE job_id = ?", (job["db_id"],))
+    for kind in SKILL_KINDS:
+        names = {normalize_skill_name(skill) for skill in extracted_skills.get(f"{kind}_skills", [])} - {""}
+        if not names:
+            continue
+        conn.executemany("INSERT OR IGNORE INTO skills (name) VALUES (?)", [(name,) for name in names])
+        conn.execute("""
+            INSERT OR IGNORE INTO job_skills (job_id, kind, skill_id)
+            SELECT ?, ?, id FROM skills WHERE name IN (SELECT value FROM json_each(?))
+        """, (job["db_id"], kind, json.dumps(sorted(names))))
     conn.commit()
 
 def remove_stopwords(text: str) -> str:
-    tokens = word_tokenize(text)
-    stop_words = set(stopwords.words('english'))
-    filtered_tokens = [token for token in tokens if token.lower() not in stop_words]
-    return ' '.join(filtered_tokens)
-
-def fetch_job_description(job_url: str, headers: dict) -> str:
+    # Same output as word_tokenize + NLTK's English stopwords, without Punkt or reloading
+    # the stopword list per call (see textnorm.py and benchmarks/bench_textnorm.py).
+    with span("remove_stopwords"):
+        return normalize(text)
+
+def fetch_job_description(job_url: str, headers: dict, session=None):
+    """The job page's description text, or None if it could not be fetched or has none."""
+    session = session or get_http_session()
     try:
-        response = requests.get(job_url, headers=headers)
+        with span("description_fetch"):
+            response = session.get(job_url, headers=headers, timeout=REQUEST_TIMEOUT)
+        inc("skillfinder_http_bytes_total", len(response.content), page="description")
         if response.status_code != 200:
-            return "Failed to fetch job description"
-        soup = BeautifulSoup(response.content, "html.parser")
-        description_div = soup.find("div", class_="show-more-less-html__markup")
-        if description_div:
-            return description_div.get_text(strip=True).replace("\n", " ")
-        return "No description available"
+            inc("skillfinder_http_errors_total", page="description")
+            print(f"Failed to fetch job description ({response.status_code}): {job_url}")
+            return None
+        with span("description_parse"):
+            return parse_job_description(response.content)
     except Exception as e:
-        return f"Error fetching job description: {e}"
-
-def scrape_jobs_with_descriptions(keywords: str, location: str, pages_to_scrape: int, headers: dict,
-                                  experience_level=[], remote=[], date_posted="", benefits=[],
-                                  easy_apply=False, sortby=""):
+        inc("skillfinder_http_errors_total", page="description")
+        print(f"Error fetching job description: {e}")
+        return None
+
+def fetch_and_clean_description(job_url: str, headers: dict, session=None) -> str:
+    # "" when there is no description to store; the posting is fetched again next run.
+    if not job_url:
+        return ""
+    raw = fetch_job_description(job_url, headers, session)
+    return remove_stopwords(raw) if raw else ""
+
+def build_search_url(keywords: str, location: str, experience_level=[], remote=[], date_posted="",
+                     benefits=[], easy_apply=False, sortby="") -> str:
     keywords_encoded = quote(keywords)
     location_encoded = quote(location)
-    base_url = f"https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search?keywords={keywords_encoded}&location={location_encoded}"
+    base_url = f"{JOB_SEARCH_URL}?keywords={keywords_encoded}&location={location_encoded}"
     if remote:
         rem_values = ",".join([remote_mapping.get(r, "") for r in remote])
         base_url += f"&f_Rem={rem_values}"
@@ -167,56 +252,87 @@ def scrape_jobs_with_descriptions(keywords: str, location: str, pages_to_scrape:
             base_url += f"&sortBy={sb_value}"
     if easy_apply:
         base_url += "&f_EA=true"
+    return base_url
 
-    jobs = []
+def iter_listing_pages(base_url: str, pages_to_scrape: int, headers: dict, session=None):
+    # Stage 1: yields the parsed job cards (without descriptions) of one listing page at a time.
+    # LinkedIn repeats cards across `start=` offsets; each posting is only yielded the first time.
+    session = session or get_http_session()
+    seen_urls = set()
     for page in range(pages_to_scrape):
         url = base_url + f"&start={25 * page}"
         print(f"Scraping job list page: {url}")
-        response = requests.get(url, headers=headers)
-
-        soup = BeautifulSoup(response.content, "html.parser")
-        cards = soup.find_all("div", class_="job-search-card")
-
-        for card in cards:
-            # — URL & Title
-            link = card.select_one("a.base-card__full-link")
-            job_url = link["href"] if link and link.has_attr("href") else None
-
-            title_tag = card.select_one("h3.base-search-card__title")
-            title = title_tag.get_text(strip=True) if title_tag else (
-                link.select_one("span.sr-only").get_text(strip=True)
-                if link and link.select_one("span.sr-only")
-                else "No title"
-            )
-
-            # — Company
-            company_tag = card.select_one("h4.base-search-card__subtitle a")
-            company = company_tag.get_text(strip=True) if company_tag else "No company"
-
-            # — Location
-            loc_tag = card.select_one("span.job-search-card__location")
-            location = loc_tag.get_text(strip=True) if loc_tag else "No location"
-
-            # — Posted Date (optional)
-            date_tag = card.select_one("time.job-search-card__listdate")
-            date_posted = date_tag["datetime"] if date_tag and date_tag.has_attr("datetime") else None
-
-            # — Fetch & clean description
-            description = ""
-            if job_url:
-                raw = fetch_job_description(job_url, headers)
-                description = remove_stopwords(raw)
-
-            jobs.append({
-                "title":       title,
-                "company":     company,
-                "location":    location,
-                "url":         job_url,
-                "date_posted": date_posted,
-                "description": description,
-            })
-
-    return jobs
+        with span("listing_fetch"):
+            response = session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        inc("skillfinder_http_bytes_total", len(response.content), page="listing")
+        if response.status_code != 200:
+            inc("skillfinder_http_errors_total", page="listing")
+
+        with span("listing_parse"):
+            parsed = parse_listing_page(response.content)
+        cards = []
+        for job in parsed:
+            if job["url"] in seen_urls:
+                continue
+            if job["url"]:
+                seen_urls.add(job["url"])
+            cards.append(job)
+        yield cards
+
+def _resolve_description(job, future):
+    if future is not None:
+        job["description"] = future.result()
+    return job
+
+def iter_jobs_with_descriptions(pages, headers: dict, max_workers=DESCRIPTION_FETCH_WORKERS, session=None,
+                                max_pending=None):
+    """
+    Stage 2: fetch & clean the description of every card coming out of `pages`
+    (cards that already carry a stored description are passed through untouched).
+    Fetches for a page are submitted as soon as its cards arrive, so they overlap with
+    downloading the next listing page. Jobs are yielded in card order as soon as they are ready.
+    At most `max_pending` jobs are held at once: when the consumer or the fetches fall behind,
+    listing pages are not read ahead, so memory stays flat however many pages are requested.
+    """
+    session = session or get_http_session()
+    max_workers = max(1, min(int(max_workers or 1), MAX_FETCH_WORKERS))
+    max_pending = max_pending or max_workers * 4
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-desc") as pool:
+        for cards in pages:
+            for job in cards:
+                inc("skillfinder_jobs_total", source="stored" if job["description"] else "fetched")
+                if job["description"]:
+                    pending.append((job, None))
+                else:
+                    pending.append((job, pool.submit(fetch_and_clean_description, job["url"], headers, session)))
+            while pending and (len(pending) > max_pending or pending[0][1] is None or pending[0][1].done()):
+                yield _resolve_description(*pending.popleft())
+        while pending:
+            yield _resolve_description(*pending.popleft())
+
+def iter_scraped_jobs(keywords: str, location: str, pages_to_scrape: int, headers: dict,
+                      experience_level=[], remote=[], date_posted="", benefits=[],
+                      easy_apply=False, sortby="", max_workers=DESCRIPTION_FETCH_WORKERS, incremental=False):
+    """
+    Yield scraped jobs one at a time, each as soon as its description has been fetched.
+    With `incremental`, stored postings reuse their stored description and paging stops at
+    the first page holding nothing new (see attach_stored_jobs).
+    """
+    base_url = build_search_url(keywords, location, experience_level, remote, date_posted,
+                                benefits, easy_apply, sortby)
+    session = get_http_session()
+    pages = iter_listing_pages(base_url, pages_to_scrape, headers, session)
+    if incremental:
+        pages = attach_stored_jobs(pages, incremental=True)
+    yield from iter_jobs_with_descriptions(pages, headers, max_workers, session)
+
+def scrape_jobs_with_descriptions(keywords: str, location: str, pages_to_scrape: int, headers: dict,
+                                  experience_level=[], remote=[], date_posted="", benefits=[],
+                                  easy_apply=False, sortby="", max_workers=DESCRIPTION_FETCH_WORKERS,
+                                  incremental=False):
+    return list(iter_scraped_jobs(keywords, location, pages_to_scrape, headers, experience_level, remote,
+                                  date_posted, benefits, easy_apply, sortby, max_workers, incremental))
 
     #     soup = BeautifulSoup(response.content, "html.parser")
     #     divs = soup.find_all("div", class_="base-card")
@@ -249,106 +365,366 @@ def clean_json_output(response_text: str) -> str:
         response_text = response_text[:-len("```")].strip()
     return response_text
 
+EMPTY_SKILLS = {"hard_skills": [], "soft_skills": []}
+
 def extract_skills(job_description: str) -> dict:
+    key = skill_cache.make_key(job_description, EXTRACT_PROMPT_VERSION, GEMINI_MODEL)
+    cached = skill_cache.get(key)
+    if cached is not None:
+        return cached
     prompt = (
         "Extract the relevant hard skills and soft skills from the following job description. "
         "Return a JSON object with exactly two keys: 'hard_skills' and 'soft_skills', mapping to arrays of strings.\n\n"
         f"Job Description: {job_description}"
     )
-    response = client.models.generate_content(model="gemini-2.0-flash", contents=prompt)
+    response = generate_content(prompt)
     cleaned = clean_json_output(response.text)
     try:
         skills = json.loads(cleaned)
     except Exception as e:
-        skills = {"hard_skills": [], "soft_skills": []}
+        return dict(EMPTY_SKILLS)
+    skill_cache.put(key, skills)
     return skills
 
-def batch_jobs(jobs, batch_size):
-    for i in range(0, len(jobs), batch_size):
-        yield jobs[i:i + batch_size]
-
-def batch_extract_skills(jobs, batch_size):
-    extracted_skills = []
-    for batch in batch_jobs(jobs, batch_size):
-        descriptions = "\n---\n".join(job['description'] for job in batch)
-        prompt = (
-            "Below are several job descriptions separated by '---'. "
-            "For each job description, extract the relevant hard skills and soft skills. "
-            "For hard skills, include programming languages, libraries, and technologies mentioned. "
-            "Return a JSON array where each element is an object with exactly two keys: "
-            "'hard_skills' and 'soft_skills', mapping to arrays of strings. "
-            "Only output the JSON array with no extra text or markdown formatting.\n\n" +
-            descriptions
-        )
-        response = client.models.generate_content(model="gemini-2.0-flash", contents=prompt)
-        cleaned = clean_json_output(response.text)
-        try:
-            batch_parsed = json.loads(cleaned)
-            if not isinstance(batch_parsed, list) or len(batch_parsed) != len(batch):
-                print("Warning: Parsed output count does not match number of job descriptions in the batch.")
-            for job_skills in batch_parsed:
-                if "hard_skills" in job_skills:
-                    job_skills["hard_skills"] = [skill.lower() for skill in job_skills["hard_skills"]]
-                if "soft_skills" in job_skills:
-                    job_skills["soft_skills"] = [skill.lower() for skill in job_skills["soft_skills"]]
-            extracted_skills.extend(batch_parsed)
-        except Exception as e:
-            print("Error parsing batched JSON:", e)
-    return extracted_skills
-
-def compute_batch_size(jobs, pages_to_scrape):
-    if pages_to_scrape <= 0:
-        return len(jobs)
-    jobs_per_page = len(jobs) // pages_to_scrape
-    if jobs_per_page <= 0:
-        return len(jobs)
-    return jobs_per_page * 2
-
-def run_pipeline(keywords: str, location: str, pages_to_scrape: int,
-                 experience_level=[], remote=[], sortby="", date_posted="",
-                 easy_apply=False, benefits=[]):
-    if date_posted == "Any time":
-        date_posted = ""
+BATCH_PROMPT = (
+    "Below are several job descriptions separated by '---'. "
+    "Each job description starts with its ID on its own line, written as [id=<ID>]. "
+    "For each job description, extract the relevant hard skills and soft skills. "
+    "For hard skills, include programming languages, libraries, and technologies mentioned. "
+    "Return a JSON array with one object per job description, each with exactly three keys: "
+    "'id' (the job's ID as a string), 'hard_skills' and 'soft_skills' (arrays of strings). "
+    "Only output the JSON array with no extra text or markdown formatting.\n\n"
+)
+BATCH_SEPARATOR = "\n---\n"
+# How many follow-up calls re-send only the items missing or malformed in a batch response.
+BATCH_REDISPATCH_ROUNDS = 2
+
+# One element of the batched response; the array itself is requested via BATCH_RESPONSE_SCHEMA.
+SKILLS_ITEM_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "id": {"type": ["string", "integer"]},
+        "hard_skills": {"type": "array", "items": {"type": "string"}},
+        "soft_skills": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["id", "hard_skills", "soft_skills"],
+}
 
-    headers = {
-        "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                       "AppleWebKit/537.36 (KHTML, like Gecko) "
-                       "Chrome/91.0.4472.124 Safari/537.36")
-    }
-    jobs = scrape_jobs_with_descriptions(keywords, location, pages_to_scrape, headers,
-                                         experience_level, remote, date_posted, benefits,
-                                         easy_apply, sortby)
-    # st.write(f"🔍 Scraped {len(jobs)} jobs") # debugging
-    if not jobs:
-        return None, None
+@lru_cache(maxsize=1)
+def skills_item_validator():
+    from jsonschema import Draft7Validator
+    return Draft7Validator(SKILLS_ITEM_SCHEMA)
+
+# The same shape in Gemini's schema dialect, so the model is constrained to emit it.
+BATCH_RESPONSE_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "id": {"type": "STRING"},
+            "hard_skills": {"type": "ARRAY", "items": {"type": "STRING"}},
+            "soft_skills": {"type": "ARRAY", "items": {"type": "STRING"}},
+        },
+        "required": ["id", "hard_skills", "soft_skills"],
+    },
+}
+BATCH_CONFIG = {"response_mime_type": "application/json", "response_schema": BATCH_RESPONSE_SCHEMA}
 
-    create_jobs_table()
-    insert_jobs(jobs, experience_level, remote, benefits, easy_apply, sortby, date_posted)
+def tag_description(job_id: str, text: str) -> str:
+    return f"[id={job_id}]\n{text}"
 
-    batch_size = compute_batch_size(jobs, pages_to_scrape)
-    extracted_skills = batch_extract_skills(jobs, batch_size)
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    return text if estimate_tokens(text) <= max_tokens else text[:max_tokens * 4]
 
-    for job, skills in zip(jobs, extracted_skills):
-        job["extracted_skills"] = skills
-        update_job_skills(job, skills)
+def batch_item_tokens(text: str) -> int:
+    # Covers the [id=...] tag and separator around each description.
+    return estimate_tokens(text) + estimate_tokens(BATCH_SEPARATOR) + 5
 
-    hard_skills_counter = Counter()
-    soft_skills_counter = Counter()
-    for job in jobs:
-        skills = job.get("extracted_skills", {})
-        hard_skills_counter.update(skills.get("hard_skills", []))
-        soft_skills_counter.update(skills.get("soft_skills", []))
+def plan_batches(descriptions, token_budget=BATCH_TOKEN_BUDGET, max_items=BATCH_MAX_ITEMS,
+                 truncate_outliers=True, max_description_tokens=MAX_DESCRIPTION_TOKENS):
+    """
+    Pack descriptions into as few prompts as possible, each under `token_budget` estimated
+    input tokens (prompt included) and at most `max_items` descriptions, so the response
+    stays within the model's output limit. Descriptions longer than `max_description_tokens`
+    are truncated when `truncate_outliers` is set; otherwise they get a batch of their own.
 
-    df_hard = pd.DataFrame(hard_skills_counter.items(), columns=["Skill", "Frequency"])
-    df_soft = pd.DataFrame(soft_skills_counter.items(), columns=["Skill", "Frequency"])
+    Returns (batches, report): each batch is a list of (index, prompt_text) pairs and
+    report holds the planned batch count, estimated tokens and number of truncated items.
+    """
+    overhead = estimate_tokens(BATCH_PROMPT)
+    items = []
+    truncated = 0
+    for i, text in enumerate(descriptions):
+        if truncate_outliers:
+            short = truncate_to_tokens(text, max_description_tokens)
+            truncated += short is not text
+            text = short
+        items.append((i, text, batch_item_tokens(text)))
+
+    # First-fit decreasing: results are matched back by index, so packing order is free.
+    batches = []
+    for item in sorted(items, key=lambda item: item[2], reverse=True):
+        for batch in batches:
+            if len(batch["items"]) < max_items and batch["tokens"] + item[2] <= token_budget:
+                batch["items"].append(item)
+                batch["tokens"] += item[2]
+                break
+        else:
+            batches.append({"items": [item], "tokens": overhead + item[2]})
+
+    report = {
+        "batches": len(batches),
+        "estimated_tokens": sum(batch["tokens"] for batch in batches),
+        "truncated": truncated,
+    }
+    return [sorted((i, text) for i, text, _ in batch["items"]) for batch in batches], report
 
-    df_hard_sorted = df_hard.sort_values("Frequency", ascending=False).head(15)
-    df_soft_sorted = df_soft.sort_values("Frequency", ascending=False).head(15)
+def _extract_batch(items) -> dict:
+    """
+    Send one batch of (job_id, text) items and return {job_id: skills} for every item
+    whose response object is valid against SKILLS_ITEM_SCHEMA and carries an ID we sent.
+    """
+    prompt = BATCH_PROMPT + BATCH_SEPARATOR.join(tag_description(job_id, text) for job_id, text in items)
+    response = generate_content(prompt, config=BATCH_CONFIG)
+    cleaned = clean_json_output(response.text)
+    try:
+        batch_parsed = json.loads(cleaned)
+    except Exception as e:
+        print("Error parsing batched JSON:", e)
+        inc("skillfinder_llm_parse_failures_total", reason="json")
+        return {}
+    if not isinstance(batch_parsed, list):
+        print("Warning: Batched response is not a JSON array.")
+        inc("skillfinder_llm_parse_failures_total", reason="not_array")
+        return {}
+
+    expected = {job_id for job_id, _ in items}
+    extracted = {}
+    for job_skills in batch_parsed:
+        if not skills_item_validator().is_valid(job_skills):
+            inc("skillfinder_llm_parse_failures_total", reason="schema")
+            continue
+        if str(job_skills["id"]) not in expected:
+            inc("skillfinder_llm_parse_failures_total", reason="unknown_id")
+            continue
+        extracted[str(job_skills["id"])] = {
+            "hard_skills": [skill.lower() for skill in job_skills["hard_skills"]],
+            "soft_skills": [skill.lower() for skill in job_skills["soft_skills"]],
+        }
+    return extracted
+
+def _extract_batch_with_redispatch(items) -> dict:
+    # Items missing from (or malformed in) a response are re-sent on their own, not the whole batch.
+    extracted = _extract_batch(items)
+    for _ in range(BATCH_REDISPATCH_ROUNDS):
+        missing = [(job_id, text) for job_id, text in items if job_id not in extracted]
+        if not missing:
+            break
+        print(f"Re-dispatching {len(missing)} of {len(items)} items missing from the batch response")
+        inc("skillfinder_llm_redispatched_items_total", len(missing))
+        extracted.update(_extract_batch(missing))
+    return extracted
+
+def batch_extract_skills(jobs, token_budget=BATCH_TOKEN_BUDGET, max_items=BATCH_MAX_ITEMS,
+                         truncate_outliers=True):
+    """
+    Extract skills for `jobs`, returning one skills dict per job in input order.
+    Descriptions already in the extraction cache are served from it; only the misses are
+    packed by plan_batches and sent to Gemini (in parallel, under the shared rate limiter),
+    and their results are cached for the next search.
+    Each description is tagged with the job's db_id and results are matched back by ID;
+    items still missing after re-dispatch get empty skills and are not cached.
+    """
+    keys = [skill_cache.make_key(job["description"], BATCH_PROMPT_VERSION, GEMINI_MODEL) for job in jobs]
+    job_ids = [str(job.get("db_id", f"job{i}")) for i, job in enumerate(jobs)]
+    cached = skill_cache.get_many(keys)
+    extracted_skills = [cached.get(key) for key in keys]
+
+    # A posting listed twice in one run shares its db_id; extract it once.
+    misses = {}
+    for i, skills in enumerate(extracted_skills):
+        if skills is None:
+            misses.setdefault(job_ids[i], i)
+    miss_ids = list(misses)
+
+    miss_batches, report = plan_batches([jobs[misses[job_id]]["description"] for job_id in miss_ids],
+                                        token_budget, max_items, truncate_outliers)
+    extracted = {}
+    if miss_batches:
+        print(f"Extracting {len(miss_ids)} of {len(jobs)} jobs in {report['batches']} batches "
+              f"(~{report['estimated_tokens']} tokens, {report['truncated']} truncated)")
+        # Miss batches are dispatched in parallel; gemini_limiter bounds the rate and calls in flight.
+        with span("llm_extraction"), ThreadPoolExecutor(max_workers=min(GEMINI_MAX_IN_FLIGHT, len(miss_batches)),
+                                                        thread_name_prefix="llm-batch") as pool:
+            tagged_batches = [[(miss_ids[j], text) for j, text in batch] for batch in miss_batches]
+            for batch_results in pool.map(_extract_batch_with_redispatch, tagged_batches):
+                extracted.update(batch_results)
+
+    fresh = {}
+    for i, job_id in enumerate(job_ids):
+        if extracted_skills[i] is None and job_id in extracted:
+            extracted_skills[i] = extracted[job_id]
+            fresh[keys[i]] = extracted[job_id]
+    skill_cache.put_many(fresh)
+
+    missing = sum(skills is None for skills in extracted_skills)
+    if missing:
+        print(f"Warning: no skills extracted for {missing} jobs after re-dispatch.")
+    return [skills if skills is not None else dict(EMPTY_SKILLS) for skills in extracted_skills]
+
+def extract_job_skills(jobs, mode=EXTRACTION_MODE, token_budget=BATCH_TOKEN_BUDGET,
+                       max_items=BATCH_MAX_ITEMS):
+    """
+    Extract skills for `jobs` (in input order) with the given mode:
+    "llm" batches everything to Gemini, "local" only runs the dictionary matcher (no network),
+    "hybrid" keeps local results with at least LOCAL_MIN_HARD_SKILLS hard skills and sends
+    only the low-coverage postings to Gemini.
+    """
+    if mode not in EXTRACTION_MODES:
+        raise ValueError(f"Unknown extraction mode {mode!r}; expected one of {EXTRACTION_MODES}")
+    if mode == "llm":
+        return batch_extract_skills(jobs, token_budget, max_items)
+
+    with span("local_extraction"):
+        matcher = get_skill_matcher(STOP_WORDS)
+        extracted_skills = matcher.match_many(job["description"] for job in jobs)
+    if mode == "local":
+        return extracted_skills
+
+    low_coverage = [i for i, skills in enumerate(extracted_skills)
+                    if len(skills["hard_skills"]) < LOCAL_MIN_HARD_SKILLS]
+    if low_coverage:
+        print(f"Hybrid extraction: {len(jobs) - len(low_coverage)} local, {len(low_coverage)} via Gemini")
+        llm_skills = batch_extract_skills([jobs[i] for i in low_coverage], token_budget, max_items)
+        for i, skills in zip(low_coverage, llm_skills):
+            extracted_skills[i] = skills
+    return extracted_skills
 
-    total_hard = df_hard_sorted["Frequency"].sum()
-    total_soft = df_soft_sorted["Frequency"].sum()
-    df_hard_sorted["Percentage"] = df_hard_sorted["Frequency"] / total_hard * 100
-    df_soft_sorted["Percentage"] = df_soft_sorted["Frequency"] / total_soft * 100
+def attach_stored_jobs(pages, incremental=False):
+    # Cards for postings we already hold reuse the stored description (and skills, if extracted).
+    # In incremental mode paging stops after the first page made up entirely of known postings;
+    # with results sorted by date, everything past it was seen by an earlier crawl.
+    for page, cards in enumerate(pages, 1):
+        stored = get_stored_jobs(job["url"] for job in cards)
+        for job in cards:
+            entry = stored.get(job["url"])
+            if entry and entry["description"]:
+                job["description"] = entry["description"]
+                if "extracted_skills" in entry:
+                    job["extracted_skills"] = entry["extracted_skills"]
+        yield cards
+        if incremental and all(stored.get(job["url"], {}).get("description") for job in cards):
+            print(f"Listing page {page} holds no new postings; stopping incremental crawl")
+            return
+
+def _store_batch_results(batch, extracted_skills):
+    with span("db_write_skills"):
+        for job, skills in zip(batch, extracted_skills):
+            job["extracted_skills"] = skills
+            update_job_skills(job, skills)
+    return batch
+
+def _report_progress(items, on_progress, event):
+    for item in items:
+        on_progress(event, item)
+        yield item
+
+def stream_pipeline(keywords: str, location: str, pages_to_scrape: int,
+                    experience_level=[], remote=[], sortby="", date_posted="",
+                    easy_apply=False, benefits=[], token_budget=BATCH_TOKEN_BUDGET,
+                    max_items=BATCH_MAX_ITEMS, extraction_mode=EXTRACTION_MODE, on_progress=None,
+                    session_id=None, incremental=False, http_session=None):
+    """
+    Streaming scrape -> extract pipeline.
+    Job cards flow into description fetching and stopword cleaning; cleaned jobs are inserted
+    and sent to Gemini as soon as a batch fills its token budget or item cap, while later
+    pages are still downloading.
+    Each batch is written back to the DB and yielded as soon as its extraction returns.
+    Postings already in the store are neither re-fetched nor re-extracted.
+    Every posting is added to the search's rollup (see rollups.py) as soon as it is stored, so
+    its skill counts grow batch by batch even if the run is interrupted.
+    `on_progress(event, item)`, if given, is called with ("page", cards) for every listing
+    page scraped and ("job", job) for every description fetched.
+    With a `session_id`, the run is recorded for that session (sessions.py) so its chat only
+    sees the postings its own runs stored.
+    With `incremental`, paging stops at the first listing page holding no new postings, so
+    refreshing a search sorted by "Date Posted" costs a page or two of requests.
+    `http_session` defaults to the shared interactive session (get_http_session).
+    """
+    if date_posted == "Any time":
+        date_posted = ""
+    search_id = get_or_create_search(keywords, location, experience_level, remote, date_posted,
+                                     easy_apply, benefits)
+    run_id = start_run(session_id, search_id) if session_id else None
+
+    def store_jobs(batch):
+        with span("db_write_jobs"):
+            insert_jobs(batch, experience_level, remote, benefits, easy_apply, sortby, date_posted)
+            add_search_jobs(search_id, [job["db_id"] for job in batch])
+            if run_id:
+                add_run_jobs(run_id, [job["db_id"] for job in batch])
+
+    base_url = build_search_url(keywords, location, experience_level, remote, date_posted,
+                                benefits, easy_apply, sortby)
+    session = http_session or get_http_session()
+    pages = attach_stored_jobs(iter_listing_pages(base_url, pages_to_scrape, DEFAULT_HEADERS, session),
+                               incremental)
+    if on_progress:
+        pages = _report_progress(pages, on_progress, "page")
+    jobs = iter_jobs_with_descriptions(pages, DEFAULT_HEADERS, session=session)
+    if on_progress:
+        jobs = _report_progress(jobs, on_progress, "job")
+
+    # Batches run in the background so Gemini calls overlap with the network stages;
+    # gemini_limiter keeps the number of concurrent calls within quota.
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=GEMINI_MAX_IN_FLIGHT, thread_name_prefix="llm-stream") as llm_pool:
+        def submit(batch):
+            store_jobs(batch)
+            in_flight[llm_pool.submit(extract_job_skills, batch, extraction_mode, token_budget, max_items)] = batch
+
+        # A batch is sent as soon as the next job would push it over the token budget or item cap.
+        batch = []
+        batch_tokens = estimate_tokens(BATCH_PROMPT)
+        for job in jobs:
+            if "extracted_skills" in job:
+                # Already extracted in an earlier run: refresh the row, skip the LLM.
+                store_jobs([job])
+                yield [job]
+                continue
+            if not job["description"]:
+                # The fetch failed: keep the card, leave the skills unset so a later run retries it.
+                store_jobs([job])
+                yield [job]
+                continue
+            job_tokens = batch_item_tokens(truncate_to_tokens(job["description"], MAX_DESCRIPTION_TOKENS))
+            if batch and batch_tokens + job_tokens > token_budget:
+                submit(batch)
+                batch, batch_tokens = [], estimate_tokens(BATCH_PROMPT)
+            batch.append(job)
+            batch_tokens += job_tokens
+            if len(batch) >= max_items:
+                submit(batch)
+                batch, batch_tokens = [], estimate_tokens(BATCH_PROMPT)
+            for future in [f for f in in_flight if f.done()]:
+                yield _store_batch_results(in_flight.pop(future), future.result())
+        if batch:
+            submit(batch)
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield _store_batch_results(in_flight.pop(future), future.result())
+
+def build_skill_figures(payload: dict):
+    """Bar charts of a search_skill_payload()."""
+    import pandas as pd
+    import plotly.express as px
+
+    df_hard_sorted = pd.DataFrame(payload["hard_skills"]).rename(
+        columns={"skill": "Skill", "frequency": "Frequency", "percentage": "Percentage"})
+    df_soft_sorted = pd.DataFrame(payload["soft_skills"]).rename(
+        columns={"skill": "Skill", "frequency": "Frequency", "percentage": "Percentage"})
 
     fig_hard = px.bar(
         df_hard_sorted,
@@ -380,33 +756,69 @@ def run_pipeline(keywords: str, location: str, pages_to_scrape: int,
 
     return fig_hard, fig_soft
 
+# Rendering is memoized on the payload, so unchanged rollups never rebuild their charts.
+@lru_cache(maxsize=32)
+def _cached_skill_figures(payload_json: str):
+    return build_skill_figures(json.loads(payload_json))
+
+def render_skill_figures(payload: dict):
+    return _cached_skill_figures(json.dumps(payload, sort_keys=True))
+
+@lru_cache(maxsize=32)
+def _cached_skill_figures_html(payload_json: str):
+    fig_hard, fig_soft = _cached_skill_figures(payload_json)
+    return (fig_hard.to_html(full_html=False, include_plotlyjs="cdn"),
+            fig_soft.to_html(full_html=False, include_plotlyjs="cdn"))
+
+def render_skill_figures_html(payload: dict):
+    return _cached_skill_figures_html(json.dumps(payload, sort_keys=True))
+
+def search_figures(keywords: str, location: str, experience_level=[], remote=[], date_posted="",
+                   easy_apply=False, benefits=[], session_id=None):
+    """
+    Charts for a search that has run (or partly run) before, served straight from its rollup
+    without scraping or extracting anything. Returns (None, None) for an unknown search.
+    With a `session_id`, the search's postings are added to that session's chat scope.
+    """
+    search_id = find_search(keywords, location, experience_level, remote, date_posted, easy_apply, benefits)
+    if search_id is None:
+        return None, None
+    if session_id:
+        attach_search(session_id, search_id)
+    payload = search_skill_payload(search_id)
+    if not payload["hard_skills"]["skill"] and not payload["soft_skills"]["skill"]:
+        return None, None
+    return render_skill_figures(payload)
+
+def run_pipeline(keywords: str, location: str, pages_to_scrape: int,
+                 experience_level=[], remote=[], sortby="", date_posted="",
+                 easy_apply=False, benefits=[], extraction_mode=EXTRACTION_MODE, session_id=None,
+                 incremental=False):
+    jobs = []
+    with span("pipeline"):
+        for batch in stream_pipeline(keywords, location, pages_to_scrape, experience_level, remote,
+                                     sortby, date_posted, easy_apply, benefits,
+                                     extraction_mode=extraction_mode, session_id=session_id,
+                                     incremental=incremental):
+            jobs.extend(batch)
+    # st.write(f"🔍 Scraped {len(jobs)} jobs") # debugging
+    if not jobs:
+        return None, None
+
+    # The rollup already holds this search's counts, including every batch just stored.
+    search_id = get_or_create_search(keywords, location, experience_level, remote, date_posted,
+                                     easy_apply, benefits)
+    with span("render_figures"):
+        return render_skill_figures(search_skill_payload(search_id))
+
 # ---------------------------------------------------------------------------
 #   NEW: SQL-DRIVEN QUESTION ANSWERING WITH CONVERSATION CONTEXT
 #   1) LLM generates a strict SQL query based on the current question and conversation history.
 #   2) We execute the SQL query.
 #   3) We ask the LLM to summarize the results in natural language.
 # ---------------------------------------------------------------------------
-import re
-import pandas as pd
-
-def answer_user_question(question: str, conversation_history=None):
-    """
-    A unified approach to handle both normal conversation and database queries.
-    1) If the user question requires referencing the database, the LLM will return an SQL query.
-    2) If the user question is general, the LLM will return a direct conversational answer.
-    We detect which path to take by checking for 'SELECT' in the LLM's output.
-    """
-
-    # Prepare conversation context if available.
-    if conversation_history:
-        # Join only the last few messages to control prompt length and cost.
-        history_to_include = conversation_history[-6:]
-        chat_context = "\n".join([f"{msg['role']}: {msg['content']}" for msg in history_to_include])
-    else:
-        chat_context = ""
-
-    # Database schema
-    schema = """
+# Schema description given to Gemini; also part of the SQL plan cache fingerprint.
+CHAT_DB_SCHEMA = """
     The SQLite database has a table called 'jobs' with the following schema:
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     job_title TEXT,
@@ -424,7 +836,48 @@ def answer_user_question(question: str, conversation_history=None):
     extracted_soft_skills TEXT,
     hard_skills_count INTEGER,
     soft_skills_count INTEGER.
+
+    Extracted skills are also normalized (lower-case) into two tables; prefer them for any
+    question about skill frequency or which jobs need a skill:
+    skills(id INTEGER PRIMARY KEY, name TEXT UNIQUE)
+    job_skills(job_id INTEGER REFERENCES jobs(id), kind TEXT ('hard' or 'soft'), skill_id INTEGER REFERENCES skills(id))
+    For example, the top hard skills are:
+    SELECT s.name, COUNT(*) AS jobs FROM job_skills js JOIN skills s ON s.id = js.skill_id
+    WHERE js.kind = 'hard' GROUP BY js.skill_id ORDER BY jobs DESC LIMIT 10
+    """
+
+def answer_user_question(question: str, conversation_history=None, session_id=None):
+    """
+    A unified approach to handle both normal conversation and database queries.
+    1) If the user question requires referencing the database, the LLM will return an SQL query.
+    2) If the user question is general, the LLM will return a direct conversational answer.
+    We detect which path to take by checking for 'SELECT' in the LLM's output.
+    Common analytics questions (top skills, counts by company/location, remote share, jobs
+    mentioning a skill) are answered by intents.route_question without calling the LLM.
+    Given a `session_id`, every query only sees postings stored by that session's runs.
     """
+    with span("chat"):
+        return _answer_user_question(question, conversation_history, session_id)
+
+def _answer_user_question(question: str, conversation_history=None, session_id=None):
+    with span("chat_route"):
+        routed = route_question(question, session_id)
+    if routed is not None:
+        answer, df, intent = routed
+        print(f"Answered locally ({intent}): {question!r}")
+        inc("skillfinder_chat_answers_total", path="intent")
+        return answer, df
+
+    # Prepare conversation context if available.
+    if conversation_history:
+        # Join only the last few messages to control prompt length and cost.
+        history_to_include = conversation_history[-6:]
+        chat_context = "\n".join([f"{msg['role']}: {msg['content']}" for msg in history_to_include])
+    else:
+        chat_context = ""
+
+    # Database schema
+    schema = CHAT_DB_SCHEMA
 
     # SINGLE PROMPT: Let the LLM decide if it needs the database or not.
     # If it does, produce ONLY the SQL query. If not, produce a normal conversation answer.
@@ -445,46 +898,70 @@ def answer_user_question(question: str, conversation_history=None):
     Your response:
     """
 
-    # 1) Generate the initial answer or SQL from the LLM
-    response = client.models.generate_content(model="gemini-2.0-flash", contents=prompt)
-    answer_raw = response.text.strip()
-    # Strip out code fences or markdown
-    answer_stripped = re.sub(r"```[a-zA-Z]*", "", answer_raw).replace("```", "").strip()
+    # 0) Standalone questions we've already turned into SQL skip the first Gemini call.
+    cache_key = cached_sql = None
+    if sql_plan_cache.is_cacheable(question):
+        fingerprint = sql_plan_cache.schema_fingerprint(get_conn(), CHAT_DB_SCHEMA)
+        cache_key = sql_plan_cache.make_key(question, fingerprint)
+        cached_sql = sql_plan_cache.get(cache_key)
+
+    if cached_sql:
+        answer_stripped = cached_sql
+    else:
+        # 1) Generate the initial answer or SQL from the LLM
+        with span("chat_llm_sql"):
+            response = generate_content(prompt)
+        answer_raw = response.text.strip()
+        # Strip out code fences or markdown
+        answer_stripped = re.sub(r"```[a-zA-Z]*", "", answer_raw).replace("```", "").strip()
 
     # 2) Check if we have an SQL query or a direct answer
     if "SELECT" in answer_stripped.upper():
         # We interpret the entire text as an SQL query
         try:
-            cur = conn.cursor()
-            cur.execute(answer_stripped)
-            rows = cur.fetchall()
-            columns = [desc[0] for desc in cur.description]
-            df = pd.DataFrame(rows, columns=columns)
+            # Row limit and projection keep the result (and the second prompt) bounded.
+            with span("chat_query"):
+                df, truncated = bounded_query(answer_stripped, question, session_id=session_id)
+            if cache_key and not cached_sql:
+                sql_plan_cache.put(cache_key, question, answer_stripped)
+
+            # Empty and single-value results need no summarizing.
+            direct_answer = scalar_answer(df)
+            if direct_answer is not None:
+                inc("skillfinder_chat_answers_total", path="sql_direct")
+                return direct_answer, df
 
             # 3) Summarize the result in a second prompt
             prompt2 = f"""
             You are JobHelper, an expert data analyst.
             The user asked: "{question}"
-            Here is the JSON array of the query result:
-            {df.to_json(orient='records')}
+            Here is the query result:
+            {result_digest(df, truncated)}
 
             Provide a concise, natural-language answer. Do NOT include SQL code in your response.
             Also remember the prior conversation context:
             {chat_context}
             """
-            response2 = client.models.generate_content(model="gemini-2.0-flash", contents=prompt2)
+            with span("chat_summarize"):
+                response2 = generate_content(prompt2)
             final_answer = response2.text.strip()
 
             # Fallback if the summarization is empty or still looks like SQL
             if not final_answer or "SELECT" in final_answer.upper():
                 final_answer = "I'm sorry, I couldn't generate a proper summary from the query result."
+            inc("skillfinder_chat_answers_total", path="sql_summary")
             return final_answer, df
 
+        except QueryRejected as e:
+            inc("skillfinder_chat_answers_total", path="rejected")
+            return f"I couldn't run that query safely: {e}.", None
         except Exception as e:
+            inc("skillfinder_chat_answers_total", path="error")
             return f"Error executing SQL query: {e}", None
 
     else:
         # If there's no SQL, assume it's a normal conversation answer
+        inc("skillfinder_chat_answers_total", path="conversation")
         return answer_stripped, None
 
 
@@ -0,0 +1,128 @@
+"""
+Check and time the chat SQL guardrails in chat_sql.bounded_query.
+
+    python benchmarks/bench_chat_sql.py [--jobs 3000] [--repeat 20]
+
+Fills a fresh temporary database with synthetic postings split between two sessions, then
+runs a fixed set of queries through bounded_query both unscoped and scoped to one session.
+Every query must be accepted or rejected as listed in QUERIES, in both modes; the time per
+accepted query (plan check included) is reported; a query SQLite refuses to compile counts as
+rejected. Exits non-zero on any unexpected decision.
+No network access or Gemini key is needed.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+HARD_SKILLS = ["python", "sql", "spark", "aws", "azure", "tableau", "excel", "java", "scala", "docker",
+               "airflow", "dbt", "snowflake", "kafka", "pytorch"]
+SOFT_SKILLS = ["communication", "collaboration", "leadership", "ownership"]
+
+# (expected decision, query). The plan check should pass keyed joins and single passes, and
+# refuse joins that rescan a large table for every outer row. Only jobs, skills and job_skills
+# (plus json_each/json_tree and recursive CTEs) may be read, and never through a schema
+# qualifier (which would bypass session scoping).
+QUERIES = [
+    ("ok", "SELECT COUNT(*) FROM jobs"),
+    ("ok", "SELECT company, COUNT(*) AS jobs FROM jobs GROUP BY company ORDER BY jobs DESC LIMIT 10"),
+    ("ok", "SELECT j.job_title FROM jobs j JOIN job_skills js ON js.job_id = j.id "
+           "JOIN skills s ON s.id = js.skill_id WHERE s.name = 'python'"),
+    ("ok", "SELECT s.name, COUNT(*) AS jobs FROM job_skills js JOIN skills s ON s.id = js.skill_id "
+           "WHERE js.kind = 'hard' GROUP BY js.skill_id ORDER BY jobs DESC LIMIT 10"),
+    ("ok", "SELECT j.company, COUNT(*) FROM jobs j JOIN job_skills js ON js.job_id = j.id "
+           "WHERE js.kind = 'soft' GROUP BY j.company"),
+    ("ok", "SELECT value, COUNT(*) FROM jobs, json_each(jobs.extracted_hard_skills) GROUP BY value"),
+    ("ok", "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < 5) "
+           "SELECT n.x, COUNT(*) FROM n JOIN jobs ON jobs.id = n.x GROUP BY n.x"),
+    ("rejected", "SELECT a.id FROM jobs a, jobs b"),
+    ("rejected", "SELECT jobs.id FROM jobs, job_skills"),
+    ("rejected", "SELECT * FROM main.jobs"),
+    ("rejected", 'SELECT COUNT(*) FROM "main"."jobs"'),
+    ("rejected", "SELECT session_id FROM runs"),
+    ("rejected", "SELECT * FROM search_jobs"),
+    ("rejected", "SELECT * FROM search_skill_counts"),
+    ("rejected", "SELECT sql FROM sqlite_master"),
+    ("rejected", "SELECT * FROM pragma_table_info('runs')"),
+    ("rejected", "WITH jobs AS (SELECT * FROM runs) SELECT * FROM jobs"),
+    ("rejected", "SELECT * FROM session_jobs"),
+    ("rejected", "SELECT x FROM (WITH RECURSIVE runs(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM runs "
+                 "WHERE x < 2) SELECT x FROM runs), runs"),
+]
+
+
+def populate(backend, sessions, total: int, seed: int) -> tuple:
+    rng = random.Random(seed)
+    session_ids = (sessions.new_session_id(), sessions.new_session_id())
+    for half, session_id in enumerate(session_ids):
+        jobs = [{
+            "title": f"Data Engineer {half}-{i}",
+            "company": f"Company {rng.randrange(200)}",
+            "location": f"City {rng.randrange(50)}",
+            "url": f"https://example.com/jobs/{half}-{i}",
+            "description": "synthetic posting",
+        } for i in range(total // 2)]
+        backend.insert_jobs(jobs, [], [], [], False, "", "")
+        run_id = sessions.start_run(session_id)
+        sessions.add_run_jobs(run_id, [job["db_id"] for job in jobs])
+        for job in jobs:
+            backend.update_job_skills(job, {"hard_skills": rng.sample(HARD_SKILLS, 4),
+                                            "soft_skills": rng.sample(SOFT_SKILLS, 2)})
+    return session_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=3000, help="synthetic postings, split between two sessions")
+    parser.add_argument("--repeat", type=int, default=20, help="times to run each accepted query")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-chat-sql-")
+    # Settings are read at import, so they are fixed before the app modules are loaded.
+    os.environ["SKILLFINDER_DB"] = os.path.join(workdir, "bench.db")
+
+    import backend
+    import sessions
+    from chat_sql import bounded_query, QueryRejected, CHAT_SQL_LARGE_TABLE_ROWS
+
+    session_ids = populate(backend, sessions, args.jobs, args.seed)
+    print(f"{args.jobs} postings in two sessions; tables above {CHAT_SQL_LARGE_TABLE_ROWS} rows count as large")
+
+    failures = 0
+    for scope, session_id, expected_jobs in (("unscoped", None, args.jobs // 2 * 2),
+                                             ("scoped", session_ids[0], args.jobs // 2)):
+        visible = int(bounded_query("SELECT COUNT(*) AS jobs FROM jobs", "", session_id=session_id)[0]["jobs"][0])
+        status = "ok" if visible == expected_jobs else "FAIL"
+        failures += visible != expected_jobs
+        print(f"{scope}: {status} {visible} postings visible (expected {expected_jobs})")
+        for expected, sql in QUERIES:
+            try:
+                bounded_query(sql, "", session_id=session_id)
+                decision, reason = "ok", ""
+            except (QueryRejected, sqlite3.Error) as e:
+                decision, reason = "rejected", f" ({e})"
+            timing = ""
+            if decision == "ok":
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    bounded_query(sql, "", session_id=session_id)
+                timing = f"{(time.perf_counter() - start) / args.repeat * 1000:7.2f} ms"
+            status = "ok" if decision == expected else "FAIL"
+            failures += decision != expected
+            print(f"  {status:4s} {decision:8s} {timing:10s} {sql[:70]}{reason[:160]}")
+
+    if failures:
+        print(f"FAIL: {failures} unexpected guardrail decision(s)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
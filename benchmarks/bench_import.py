@@ -0,0 +1,73 @@
+"""
+Measure cold import time of the app modules and check that heavy dependencies stay lazy.
+
+    python benchmarks/bench_import.py [--modules backend main] [--runs 5] [--max-ms 800]
+
+Each run imports the module in a fresh interpreter with `-X importtime`. Reports the median
+cumulative import time and the slowest imported packages, and exits non-zero if a heavy
+dependency is imported eagerly or the median exceeds --max-ms.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed once a pipeline runs or a question is asked, never at import.
+LAZY_MODULES = ["pandas", "plotly", "google.genai", "bs4", "lxml", "streamlit", "jsonschema", "nltk"]
+
+
+def import_profile(module: str) -> dict:
+    """Return {package: cumulative_us} for one cold import of `module`."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    profile = {}
+    for line in result.stderr.splitlines():
+        # "import time:  self_us | cumulative_us | package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, package = line.split("|")
+        profile[package.strip()] = int(cumulative)
+    return profile
+
+
+def eager_heavy_modules(module: str) -> list:
+    code = (f"import sys, json; import {module}; "
+            f"print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=["backend", "main"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if a median exceeds this")
+    parser.add_argument("--top", type=int, default=8, help="slowest packages to list")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        profiles = [import_profile(module) for _ in range(args.runs)]
+        median_ms = statistics.median(profile[module] for profile in profiles) / 1000
+        print(f"import {module}: median {median_ms:.0f} ms over {args.runs} runs")
+
+        slowest = sorted(profiles[-1].items(), key=lambda item: item[1], reverse=True)
+        for package, cumulative in [item for item in slowest if "." not in item[0]][:args.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {package}")
+
+        eager = eager_heavy_modules(module)
+        if eager:
+            print(f"  FAIL: {module} eagerly imports {', '.join(eager)}")
+            failed = True
+        if args.max_ms is not None and median_ms > args.max_ms:
+            print(f"  FAIL: median {median_ms:.0f} ms exceeds --max-ms {args.max_ms:.0f}")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Compare the HTML parsers in htmlparse.py on saved listing and job pages.
+
+    python benchmarks/bench_parse.py [--repeat 50] [--parsers lxml strainer bs4]
+
+Parses every benchmarks/fixtures/listing_*.html with parse_listing_page and every
+job_*.html with parse_job_description, checks that each parser returns exactly what the
+original html.parser path ("bs4") returns, and reports parse time per page and speedup.
+Exits non-zero if any output differs. No network access is needed.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import htmlparse
+
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+
+
+def load_pages(pattern: str) -> list:
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES, pattern))):
+        with open(path, "rb") as f:
+            pages.append((os.path.basename(path), f.read()))
+    return pages
+
+
+def time_per_page(parse, pages, parser, repeat) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for _, content in pages:
+            parse(content, parser)
+    return (time.perf_counter() - start) / (repeat * len(pages))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=50, help="times to parse each fixture")
+    parser.add_argument("--parsers", nargs="+", default=["lxml", "strainer", "bs4"],
+                        choices=[name for name in htmlparse.HTML_PARSERS if name != "auto"])
+    args = parser.parse_args()
+    if "lxml" in args.parsers and not htmlparse.lxml_available():
+        print("lxml is not installed; skipping it")
+        args.parsers.remove("lxml")
+
+    mismatches = 0
+    for label, parse, pattern in [("listing pages", htmlparse.parse_listing_page, "listing_*.html"),
+                                  ("job pages", htmlparse.parse_job_description, "job_*.html")]:
+        pages = load_pages(pattern)
+        if not pages:
+            print(f"No {pattern} fixtures in {FIXTURES}")
+            continue
+        size_kb = sum(len(content) for _, content in pages) / len(pages) / 1024
+        print(f"{label}: {len(pages)} fixture(s), {size_kb:.0f} KB on average")
+
+        for name, content in pages:
+            expected = parse(content, "bs4")
+            for parser_name in args.parsers:
+                if parse(content, parser_name) != expected:
+                    print(f"  MISMATCH: {parser_name} on {name}")
+                    mismatches += 1
+
+        baseline = None
+        for parser_name in ["bs4"] + [name for name in args.parsers if name != "bs4"]:
+            seconds = time_per_page(parse, pages, parser_name, args.repeat)
+            baseline = baseline or seconds
+            print(f"  {parser_name:9s} {seconds * 1000:8.2f} ms/page  {baseline / seconds:5.1f}x")
+
+    if mismatches:
+        print(f"FAIL: {mismatches} parser output(s) differ from html.parser")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
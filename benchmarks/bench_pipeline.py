@@ -0,0 +1,308 @@
+"""
+End-to-end run_pipeline benchmark against a local stand-in for LinkedIn and Gemini.
+
+    python benchmarks/bench_pipeline.py [--jobs 10 100 1000] [--latency-ms 50] [--error-rate 0]
+                                        [--llm-delay-ms 500] [--extraction-mode llm] [--json out.json]
+
+A local HTTP server (its own process) serves listing and job pages built from the recorded
+fixtures in benchmarks/fixtures/, with configurable latency and error rate. A fake genai
+client, injected with llm.set_client, returns deterministic skill JSON after a configurable
+delay. Every run uses a fresh temporary database, so nothing is read from or written to
+SKILLFINDER_DB. For each job count, reports end-to-end latency, time to the first extracted
+batch, jobs per second, peak memory and per-stage busy time. Stage times are summed across
+worker threads, so they can add up to more than the wall time.
+Exits non-zero if a run stores fewer jobs than requested while --error-rate is 0.
+"""
+import argparse
+import html
+import json
+import math
+import multiprocessing
+import os
+import random
+import re
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+PAGE_SIZE = 25  # cards per LinkedIn listing page
+
+HARD_SKILLS = ["Python", "SQL", "Spark", "AWS", "Azure", "GCP", "Tableau", "Power BI", "Looker", "Excel", "Java",
+               "Scala", "Go", "Kubernetes", "Docker", "Airflow", "dbt", "Snowflake", "Kafka", "PyTorch",
+               "TensorFlow", "scikit-learn", "pandas", "Git", "Terraform"]
+SOFT_SKILLS = ["communication", "collaboration", "leadership", "mentoring", "problem solving", "ownership",
+               "stakeholder management", "curiosity"]
+
+
+# --- Stand-in LinkedIn --------------------------------------------------------------------
+
+def load_templates():
+    with open(os.path.join(FIXTURES, "listing_page.html"), encoding="utf-8") as f:
+        cards = re.findall(r"<li>.*?</li>", f.read(), re.S)
+    with open(os.path.join(FIXTURES, "job_page.html"), encoding="utf-8") as f:
+        job_page = f.read()
+    match = re.search(r'(<div class="show-more-less-html__markup[^>]*>)(.*?)(</div>)', job_page, re.S)
+    with open(os.path.join(FIXTURES, "descriptions.jsonl"), encoding="utf-8") as f:
+        descriptions = [json.loads(line)["description"] for line in f if line.strip()]
+    return cards, job_page[:match.end(1)], job_page[match.start(3):], descriptions
+
+
+def serve(port_queue, latency_ms, error_rate, seed):
+    cards, job_prefix, job_suffix, descriptions = load_templates()
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+    job_url_re = re.compile(r'href="https://www\.linkedin\.com/jobs/view/[^"]*"')
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body: str):
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            with rng_lock:
+                delay = latency_ms / 1000 * rng.uniform(0.5, 1.5)
+                failed = rng.random() < error_rate
+            time.sleep(delay)
+            if failed:
+                return self._send(503, "Service Unavailable")
+            url = urlsplit(self.path)
+            if url.path.startswith("/jobs/view/"):
+                job_id = url.path.rsplit("/", 1)[-1]
+                number = int(job_id.rsplit("-", 1)[-1])
+                text = f"{descriptions[number % len(descriptions)]} Requisition {job_id}."
+                return self._send(200, job_prefix + html.escape(text) + job_suffix)
+            # Search keywords are "<namespace>-<total jobs>".
+            query = parse_qs(url.query)
+            namespace = query.get("keywords", ["bench-0"])[0]
+            total = int(namespace.rsplit("-", 1)[-1])
+            start = int(query.get("start", ["0"])[0])
+            page = []
+            for k in range(max(0, min(PAGE_SIZE, total - start))):
+                job_url = f'href="http://127.0.0.1:{self.server.server_port}/jobs/view/{namespace}-{start + k}"'
+                page.append(job_url_re.sub(job_url, cards[k % len(cards)]))
+            return self._send(200, "".join(page))
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+# --- Stand-in Gemini ----------------------------------------------------------------------
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModels:
+    def __init__(self, delay):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def skills(text: str) -> dict:
+        lowered = text.lower()
+        return {
+            "hard_skills": [s for s in HARD_SKILLS if re.search(rf"(?<!\w){re.escape(s.lower())}(?!\w)", lowered)],
+            "soft_skills": [s for s in SOFT_SKILLS if s in lowered],
+        }
+
+    def generate_content(self, model, contents, config=None):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        tagged = re.findall(r"\[id=([^\]]+)\]\n(.*?)(?=\n---\n\[id=|\Z)", contents, re.S)
+        if tagged:
+            return FakeResponse(json.dumps([{"id": job_id, **self.skills(text)} for job_id, text in tagged]))
+        return FakeResponse(json.dumps(self.skills(contents)))
+
+
+class FakeGenaiClient:
+    """Enough of google.genai.Client for llm.generate_content: deterministic skills after `delay`."""
+
+    def __init__(self, delay=0.5):
+        self.models = FakeModels(delay)
+
+
+# --- Measurement --------------------------------------------------------------------------
+
+class StageTimer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.samples = {}
+        self.bytes = {}
+
+    def record(self, stage, start, seconds, nbytes=0):
+        with self._lock:
+            self.samples.setdefault(stage, []).append((start, seconds))
+            self.bytes[stage] = self.bytes.get(stage, 0) + nbytes
+
+    def wrap(self, module, name, stage):
+        original = getattr(module, name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.record(stage, start, time.perf_counter() - start)
+        setattr(module, name, timed)
+        return original
+
+    def summary(self) -> dict:
+        stages = {}
+        for stage, samples in self.samples.items():
+            durations = sorted(seconds for _, seconds in samples)
+            stages[stage] = {
+                "calls": len(durations),
+                "total_s": round(sum(durations), 3),
+                "mean_ms": round(sum(durations) / len(durations) * 1000, 2),
+                "p95_ms": round(durations[min(len(durations) - 1, int(len(durations) * 0.95))] * 1000, 2),
+                "bytes": self.bytes.get(stage, 0),
+            }
+        return stages
+
+
+def instrument(backend, timer):
+    # Stages are the functions run_pipeline calls through backend's globals, plus HTTP GETs.
+    for name, stage in [("parse_listing_page", "listing_parse"), ("parse_job_description", "description_parse"),
+                        ("remove_stopwords", "remove_stopwords"), ("generate_content", "llm_call"),
+                        ("extract_job_skills", "llm_batch"), ("insert_jobs", "db_insert_jobs"),
+                        ("update_job_skills", "db_update_skills"), ("add_search_jobs", "db_search_rollup"),
+                        ("render_skill_figures", "render_figures")]:
+        timer.wrap(backend, name, stage)
+
+    session = backend.get_http_session()
+    get = session.get
+
+    def timed_get(url, *args, **kwargs):
+        start = time.perf_counter()
+        response = get(url, *args, **kwargs)
+        stage = "description_fetch" if "/jobs/view/" in url else "listing_fetch"
+        timer.record(stage, start, time.perf_counter() - start, len(response.content))
+        return response
+    session.get = timed_get
+
+
+def run_size(backend, timer, total, args):
+    timer.reset()
+    keywords = f"bench{uuid.uuid4().hex[:8]}-{total}"
+    if args.tracemalloc:
+        tracemalloc.start()
+    start = time.perf_counter()
+    backend.run_pipeline(keywords, "Benchmark City", math.ceil(total / PAGE_SIZE),
+                         extraction_mode=args.extraction_mode)
+    wall = time.perf_counter() - start
+    heap_peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+    if args.tracemalloc:
+        tracemalloc.stop()
+
+    stored = backend.get_conn().execute("SELECT COUNT(*) FROM jobs WHERE job_url LIKE ?",
+                                        (f"%/jobs/view/{keywords}-%",)).fetchone()[0]
+    batches = timer.samples.get("llm_batch", [])
+    first_batch = min((s + d for s, d in batches), default=None)
+    return {
+        "jobs_requested": total,
+        "jobs_stored": stored,
+        "wall_s": round(wall, 3),
+        "jobs_per_s": round(stored / wall, 1) if wall else None,
+        "first_batch_s": round(first_batch - start, 3) if first_batch is not None else None,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_heap_mb": round(heap_peak / 2 ** 20, 1) if heap_peak is not None else None,
+        "stages": timer.summary(),
+    }
+
+
+def print_result(result):
+    heap = f", heap peak {result['peak_heap_mb']} MB" if result["peak_heap_mb"] is not None else ""
+    first = f"{result['first_batch_s']:.2f}s" if result["first_batch_s"] is not None else "-"
+    print(f"{result['jobs_requested']} jobs: {result['jobs_stored']} stored in {result['wall_s']:.2f}s "
+          f"({result['jobs_per_s']} jobs/s), first batch after {first}, {result['llm_calls']} LLM calls, "
+          f"peak RSS {result['peak_rss_mb']} MB{heap}")
+    print(f"    {'stage':20s} {'calls':>7s} {'busy s':>8s} {'mean ms':>9s} {'p95 ms':>9s} {'MB':>8s}")
+    for stage, stats in sorted(result["stages"].items(), key=lambda item: -item[1]["total_s"]):
+        mb = f"{stats['bytes'] / 2 ** 20:8.1f}" if stats["bytes"] else f"{'':8s}"
+        print(f"    {stage:20s} {stats['calls']:7d} {stats['total_s']:8.2f} {stats['mean_ms']:9.2f} "
+              f"{stats['p95_ms']:9.2f} {mb}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, nargs="+", default=[10, 100, 1000], help="job counts to run")
+    parser.add_argument("--latency-ms", type=float, default=50, help="mean stand-in server latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 503")
+    parser.add_argument("--llm-delay-ms", type=float, default=500, help="fake Gemini latency per call")
+    parser.add_argument("--extraction-mode", default="llm", choices=["llm", "hybrid", "local"])
+    parser.add_argument("--fetch-workers", type=int, default=None, help="DESCRIPTION_FETCH_WORKERS override")
+    parser.add_argument("--tracemalloc", action="store_true", help="also report Python heap peak (slower)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-pipeline-")
+    # Settings are read at import, so they are fixed before backend is loaded.
+    os.environ["SKILLFINDER_DB"] = os.path.join(workdir, "bench.db")
+    os.environ["GEMINI_RPM"] = os.environ["GEMINI_TPM"] = str(10 ** 9)
+    if args.fetch_workers:
+        os.environ["DESCRIPTION_FETCH_WORKERS"] = str(args.fetch_workers)
+
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(port_queue, args.latency_ms, args.error_rate, args.seed),
+                                     daemon=True)
+    server.start()
+    port = port_queue.get(timeout=30)
+
+    import backend
+    import llm
+    backend.JOB_SEARCH_URL = f"http://127.0.0.1:{port}/search"
+    client = FakeGenaiClient(args.llm_delay_ms / 1000)
+    llm.set_client(client)
+    timer = StageTimer()
+    instrument(backend, timer)
+
+    results, failed = [], False
+    try:
+        for total in args.jobs:
+            calls_before = client.models.calls
+            result = run_size(backend, timer, total, args)
+            result["llm_calls"] = client.models.calls - calls_before
+            results.append(result)
+            print_result(result)
+            if args.error_rate == 0 and result["jobs_stored"] < total:
+                print(f"  FAIL: only {result['jobs_stored']} of {total} jobs stored")
+                failed = True
+    finally:
+        server.terminate()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Compare textnorm.normalize with the original NLTK-based remove_stopwords.
+
+    python benchmarks/bench_textnorm.py [--copies 200] [--processes 4]
+
+Checks that both produce identical output on the fixture descriptions and reports
+throughput for the reference, the single-process normalizer and normalize_many.
+Exits non-zero if any output differs.
+"""
+import argparse
+import difflib
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import nltk
+nltk.data.path.append(os.path.join(ROOT, "nltk_data"))
+from nltk.tokenize import word_tokenize
+from nltk.corpus import stopwords
+
+import textnorm
+
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures", "descriptions.jsonl")
+
+
+def reference_remove_stopwords(text: str) -> str:
+    # backend.remove_stopwords before textnorm.
+    tokens = word_tokenize(text)
+    stop_words = set(stopwords.words('english'))
+    filtered_tokens = [token for token in tokens if token.lower() not in stop_words]
+    return ' '.join(filtered_tokens)
+
+
+def load_descriptions() -> list:
+    with open(FIXTURES, encoding="utf-8") as f:
+        return [json.loads(line)["description"] for line in f if line.strip()]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--copies", type=int, default=200, help="times to repeat the fixture set")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    fixtures = load_descriptions()
+    mismatches = 0
+    for text in fixtures:
+        expected, actual = reference_remove_stopwords(text), textnorm.normalize(text)
+        if expected != actual:
+            mismatches += 1
+            diff = difflib.SequenceMatcher(None, expected.split(" "), actual.split(" "))
+            for op, a1, a2, b1, b2 in diff.get_opcodes():
+                if op != "equal":
+                    print(f"  {op}: {expected.split(' ')[a1:a2]} -> {actual.split(' ')[b1:b2]}")
+    print(f"identical output: {len(fixtures) - mismatches}/{len(fixtures)} fixtures")
+
+    texts = fixtures * args.copies
+    _, reference_s = timed(lambda: [reference_remove_stopwords(t) for t in texts])
+    _, single_s = timed(lambda: [textnorm.normalize(t) for t in texts])
+    _, pooled_s = timed(textnorm.normalize_many, texts, args.processes)
+
+    print(f"{len(texts)} descriptions")
+    print(f"  reference (word_tokenize)   {len(texts) / reference_s:10.0f} docs/s")
+    print(f"  textnorm.normalize          {len(texts) / single_s:10.0f} docs/s  "
+          f"({reference_s / single_s:.1f}x)")
+    print(f"  normalize_many ({args.processes} procs)    {len(texts) / pooled_s:10.0f} docs/s  "
+          f"({reference_s / pooled_s:.1f}x)")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import re
+import threading
+import time
+
+from config import get_setting
+from db import get_conn
+from metrics import inc
+
+SKILL_CACHE_TTL = int(get_setting("SKILL_CACHE_TTL", str(30 * 24 * 3600)))
+SKILL_CACHE_MAX_ENTRIES = int(get_setting("SKILL_CACHE_MAX_ENTRIES", "50000"))
+SQL_PLAN_CACHE_TTL = int(get_setting("SQL_PLAN_CACHE_TTL", str(7 * 24 * 3600)))
+SQL_PLAN_CACHE_MAX_ENTRIES = int(get_setting("SQL_PLAN_CACHE_MAX_ENTRIES", "2000"))
+# Keep IN (...) lists under SQLite's historical 999-variable limit.
+_CHUNK = 500
+
+
+class ExtractionCache:
+    """
+    Persistent, content-addressed cache of extracted skills, stored in the job store.
+    Entries are keyed by a hash of the cleaned description, the prompt version and the model,
+    expire after `ttl_seconds` and are evicted least-recently-used beyond `max_entries`.
+    """
+
+    def __init__(self, ttl_seconds=SKILL_CACHE_TTL, max_entries=SKILL_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(description: str, prompt_version: str, model: str) -> str:
+        payload = "\0".join([prompt_version, model, description or ""])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys) -> dict:
+        """Return {key: skills} for every key with a live entry, and count hits/misses."""
+        keys = list(dict.fromkeys(keys))
+        conn = get_conn()
+        now = time.time()
+        found = {}
+        for i in range(0, len(keys), _CHUNK):
+            chunk = keys[i:i + _CHUNK]
+            placeholders = ",".join("?" for _ in chunk)
+            rows = conn.execute(
+                f"SELECT key, skills FROM skill_cache WHERE key IN ({placeholders}) AND created_at >= ?",
+                chunk + [now - self.ttl_seconds],
+            ).fetchall()
+            found.update((key, json.loads(skills)) for key, skills in rows)
+        if found:
+            conn.executemany("UPDATE skill_cache SET last_used = ? WHERE key = ?",
+                             [(now, key) for key in found])
+            conn.commit()
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        inc("skillfinder_cache_requests_total", len(found), cache="skill", result="hit")
+        inc("skillfinder_cache_requests_total", len(keys) - len(found), cache="skill", result="miss")
+        return found
+
+    def get(self, key: str):
+        return self.get_many([key]).get(key)
+
+    def put_many(self, entries: dict):
+        if not entries:
+            return
+        conn = get_conn()
+        now = time.time()
+        conn.executemany("""
+            INSERT INTO skill_cache (key, skills, created_at, last_used) VALUES (?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET skills = excluded.skills,
+                created_at = excluded.created_at, last_used = excluded.last_used
+        """, [(key, json.dumps(skills), now, now) for key, skills in entries.items()])
+        conn.commit()
+        self.evict()
+
+    def put(self, key: str, skills: dict):
+        self.put_many({key: skills})
+
+    def evict(self) -> int:
+        conn = get_conn()
+        expired = conn.execute("DELETE FROM skill_cache WHERE created_at < ?",
+                               (time.time() - self.ttl_seconds,)).rowcount
+        overflow = conn.execute("""
+            DELETE FROM skill_cache WHERE key IN (
+                SELECT key FROM skill_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,)).rowcount
+        conn.commit()
+        with self._lock:
+            self.evictions += expired + overflow
+        return expired + overflow
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Questions that lean on earlier turns ("and for those?", "what about remote ones?") need the
+# conversation to be turned into SQL, so they are never answered from the plan cache.
+_FOLLOW_UP_RE = re.compile(r"\b(it|its|they|them|their|those|these|that one|same|above|previous|"
+                           r"what about|how about|and for|instead)\b")
+
+
+def is_standalone_question(question: str) -> bool:
+    return not _FOLLOW_UP_RE.search(SqlPlanCache.normalize_question(question))
+
+
+class SqlPlanCache:
+    """
+    Cache of chat SQL generated by Gemini, keyed by the normalized question and a fingerprint
+    of the database schema and prompt, so schema or prompt changes never serve stale SQL.
+    A cached query is re-compiled against the live schema before use and dropped if it no
+    longer prepares. Entries expire after `ttl_seconds` and are evicted least-recently-used
+    beyond `max_entries`.
+    """
+
+    def __init__(self, ttl_seconds=SQL_PLAN_CACHE_TTL, max_entries=SQL_PLAN_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize_question(question: str) -> str:
+        # Case, punctuation and spacing don't change the query; numbers and words do.
+        return " ".join(re.sub(r"[^\w\s]", " ", question.lower()).split())
+
+    @staticmethod
+    def is_cacheable(question: str) -> bool:
+        return is_standalone_question(question)
+
+    @staticmethod
+    def schema_fingerprint(conn, prompt_schema: str) -> str:
+        tables = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type IN ('table', 'view') AND sql IS NOT NULL ORDER BY name"
+        ).fetchall()
+        payload = "\0".join([prompt_schema] + [sql for (sql,) in tables])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def make_key(self, question: str, fingerprint: str) -> str:
+        payload = "\0".join([fingerprint, self.normalize_question(question)])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """Return the cached SQL for `key` if it is live and still compiles, else None."""
+        conn = get_conn()
+        now = time.time()
+        row = conn.execute("SELECT sql FROM sql_plan_cache WHERE key = ? AND created_at >= ?",
+                           (key, now - self.ttl_seconds)).fetchone()
+        sql = row[0] if row else None
+        if sql is not None:
+            try:
+                conn.execute(f"EXPLAIN {sql}").fetchall()
+            except Exception:
+                conn.execute("DELETE FROM sql_plan_cache WHERE key = ?", (key,))
+                conn.commit()
+                with self._lock:
+                    self.invalidations += 1
+                sql = None
+        if sql is not None:
+            conn.execute("UPDATE sql_plan_cache SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            conn.commit()
+        with self._lock:
+            if sql is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        inc("skillfinder_cache_requests_total", cache="sql_plan", result="miss" if sql is None else "hit")
+        return sql
+
+    def put(self, key: str, question: str, sql: str):
+        conn = get_conn()
+        now = time.time()
+        conn.execute("""
+            INSERT INTO sql_plan_cache (key, question, sql, created_at, last_used) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET sql = excluded.sql,
+                created_at = excluded.created_at, last_used = excluded.last_used
+        """, (key, question, sql, now, now))
+        conn.commit()
+        self.evict()
+
+    def evict(self) -> int:
+        conn = get_conn()
+        expired = conn.execute("DELETE FROM sql_plan_cache WHERE created_at < ?",
+                               (time.time() - self.ttl_seconds,)).rowcount
+        overflow = conn.execute("""
+            DELETE FROM sql_plan_cache WHERE key IN (
+                SELECT key FROM sql_plan_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,)).rowcount
+        conn.commit()
+        with self._lock:
+            self.evictions += expired + overflow
+        return expired + overflow
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+skill_cache = ExtractionCache()
+sql_plan_cache = SqlPlanCache()
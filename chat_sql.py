@@ -0,0 +1,276 @@
+import json
+import re
+import sqlite3
+import time
+
+from config import get_setting
+from db import get_plan_conn
+from llm import estimate_tokens
+from sessions import scoped_readonly_conn, SCOPE_TABLE
+
+# Bounds for running chat SQL and for what its result may cost in the summarization prompt.
+CHAT_MAX_ROWS = int(get_setting("CHAT_MAX_ROWS", "500"))
+CHAT_SUMMARY_TOKEN_BUDGET = int(get_setting("CHAT_SUMMARY_TOKEN_BUDGET", "3000"))
+MAX_CELL_CHARS = 300
+TOP_VALUES = 10
+# Guardrails for SQL we didn't write: wall-clock limit, enforced via SQLite's progress handler,
+# and the table size above which a full scan inside a join loop is refused.
+CHAT_SQL_TIMEOUT_SECONDS = float(get_setting("CHAT_SQL_TIMEOUT_SECONDS", "5"))
+CHAT_SQL_LARGE_TABLE_ROWS = int(get_setting("CHAT_SQL_LARGE_TABLE_ROWS", "1000"))
+PROGRESS_HANDLER_OPS = 10000
+
+# Wide text columns only worth fetching when the question is about them.
+LARGE_COLUMNS = {"job_description", "extracted_hard_skills", "extracted_soft_skills"}
+_WANTS_TEXT_RE = re.compile(r"\b(descriptions?|describe[sd]?|full text|requirements text|responsibilit)", re.I)
+
+
+# The only tables generated SQL may read. Everything else (runs, rollups, caches, sqlite_*
+# and pragma functions) is refused by the authorizer, and so is any schema qualifier: on a
+# session-scoped connection "main.jobs" would bypass the views.
+CHAT_TABLES = {"jobs", "skills", "job_skills"}
+# Table-valued functions for the JSON extracted_*_skills columns, which CHAT_DB_SCHEMA lists.
+CHAT_TABLE_FUNCTIONS = {"json_each", "json_tree"}
+# SQLite registers an eponymous table function in sqlite_master the first time a connection
+# uses it; doing that before the authorizer is set keeps it from looking like a schema read.
+_TABLE_FUNCTIONS_WARMUP = "SELECT 1 FROM json_each('[]'), json_tree('[]')"
+_SCHEMA_QUALIFIER_RE = re.compile(r"""(?:\b|["`\[])(?:main|temp|temporary|sqlite_temp_schema)["`\]]?\s*\.""", re.I)
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_ALLOWED_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_FUNCTION}
+
+
+class QueryRejected(Exception):
+    pass
+
+
+def check_schema_qualifiers(sql: str):
+    if _SCHEMA_QUALIFIER_RE.search(_STRING_LITERAL_RE.sub("''", sql)):
+        raise QueryRejected("the query may not name a schema (main., temp.); use the table names alone")
+
+
+def _authorizer(denied: list, schema_names: set):
+    recursive_ctes = set()
+
+    def authorize(action, arg1, arg2, db_name, source):
+        if action == sqlite3.SQLITE_READ:
+            # The scoping views read SCOPE_TABLE; generated SQL can't name it itself.
+            if (arg1 in CHAT_TABLES or arg1 in CHAT_TABLE_FUNCTIONS or arg1 in recursive_ctes
+                    or (arg1 == SCOPE_TABLE and source is not None)):
+                return sqlite3.SQLITE_OK
+            denied.append(f"table {arg1}")
+        elif action == sqlite3.SQLITE_RECURSIVE:
+            # SQLite names a recursive CTE here before the CTE reads its own rows. One named
+            # after another table would let a read of that table outside the WITH through.
+            if source in CHAT_TABLES or source not in schema_names:
+                recursive_ctes.add(source)
+                return sqlite3.SQLITE_OK
+            denied.append(f"a recursive CTE named {source}")
+        elif action in _ALLOWED_ACTIONS:
+            return sqlite3.SQLITE_OK
+        elif action == sqlite3.SQLITE_PRAGMA:
+            denied.append(f"PRAGMA {arg1}")
+        elif action == sqlite3.SQLITE_UPDATE and arg1 == "sqlite_master":
+            # Only SQLite registering a table function on first use updates sqlite_master here.
+            denied.append(f"table functions other than {'/'.join(sorted(CHAT_TABLE_FUNCTIONS))}")
+        else:
+            denied.append(f"SQLite action {action} on {arg1}" if arg1 else f"SQLite action {action}")
+        return sqlite3.SQLITE_DENY
+    return authorize
+
+
+def _strip_sql(sql: str) -> str:
+    return sql.strip().rstrip(";").strip()
+
+
+_TABLE_REF_RE = re.compile(r"(?:\bfrom|\bjoin|,)\s+([A-Za-z_]\w*)(?:\s+(?:as\s+)?([A-Za-z_]\w*))?", re.I)
+_NOT_ALIASES = {"where", "join", "inner", "left", "right", "full", "cross", "natural", "outer", "on", "using",
+                "group", "order", "limit", "having", "union", "except", "intersect", "window", "as"}
+# Walking a whole index is still a full scan; only SEARCH means a keyed lookup.
+_FULL_SCAN_RE = re.compile(r"^SCAN (\w+)(?: USING (?:COVERING )?INDEX \w+)?$")
+_SEARCH_RE = re.compile(r"^SEARCH (\w+) USING (?:(?:COVERING )?INDEX (\w+)|(INTEGER )?PRIMARY KEY) \(([^)]*)\)$")
+_EQUALS_RE = re.compile(r"^\w+=\?$")
+
+
+def _table_refs(conn, sql: str) -> dict:
+    # Map every table name and alias in the query to its table.
+    tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    refs = {}
+    for table, alias in _TABLE_REF_RE.findall(sql):
+        if table not in tables:
+            continue
+        refs[table] = table
+        if alias and alias.lower() not in _NOT_ALIASES:
+            refs[alias] = table
+    return refs
+
+
+def _table_rows(conn, refs: dict) -> dict:
+    # Row count of every table name and alias in `refs`.
+    counts = {table: conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] for table in set(refs.values())}
+    return {name: counts[table] for name, table in refs.items()}
+
+
+def _single_row(conn, detail: str, refs: dict) -> bool:
+    # A SEARCH with an equality on every column of a unique index (or the rowid) finds one row.
+    search = _SEARCH_RE.match(detail)
+    if not search:
+        return False
+    name, index, integer_pk, constraints = search.groups()
+    constraints = constraints.split(" AND ")
+    if not all(_EQUALS_RE.match(constraint) for constraint in constraints):
+        return False
+    if integer_pk:
+        return constraints == ["rowid=?"]
+    table = refs.get(name)
+    if table is None:
+        return False
+    unique = {index_name: origin for index_name, is_unique, origin in conn.execute(
+        'SELECT name, "unique", origin FROM pragma_index_list(?)', (table,)) if is_unique}
+    if index is None:
+        index = next((index_name for index_name, origin in unique.items() if origin == "pk"), None)
+    if index not in unique:
+        return False
+    columns = conn.execute("SELECT COUNT(*) FROM pragma_index_info(?)", (index,)).fetchone()[0]
+    return len(constraints) == columns
+
+
+def check_query_plan(conn, sql: str):
+    """
+    Refuse plans that would full-scan a large table once per row of an outer loop (joins
+    without a usable condition, cartesian products). A single pass over a table, e.g. for a
+    GROUP BY, is allowed; the timeout bounds it. So is a scan below outer loops that are all
+    single-row lookups (skills.name = ?), since it also runs once.
+    Pass get_plan_conn(): on a session-scoped connection every table is a view and the plan
+    only shows the lookups that scope it.
+    """
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    refs = table_rows = None
+    loops = {}
+    for _, parent, _, detail in plan:
+        if not detail.startswith(("SCAN", "SEARCH")):
+            continue
+        loops.setdefault(parent, []).append(detail)
+        scan = _FULL_SCAN_RE.match(detail)
+        if not scan or len(loops[parent]) == 1:
+            continue
+        if refs is None:
+            refs = _table_refs(conn, sql)
+            table_rows = _table_rows(conn, refs)
+        if all(_single_row(conn, outer, refs) for outer in loops[parent][:-1]):
+            continue
+        # Names we can't resolve (views, CTEs) are treated as large.
+        size = table_rows.get(scan.group(1))
+        if size is None or size > CHAT_SQL_LARGE_TABLE_ROWS:
+            rows = f" ({size} rows)" if size is not None else ""
+            raise QueryRejected(
+                f"the query would scan all of {scan.group(1)}{rows} for every row of "
+                f"{loops[parent][0].split()[1]}; join on an indexed column such as an id or add a filter"
+            )
+
+
+def bounded_query(sql: str, question: str, max_rows=CHAT_MAX_ROWS, timeout=CHAT_SQL_TIMEOUT_SECONDS,
+                  session_id=None):
+    """
+    Run `sql` on this thread's read-only connection, scoped to `session_id`'s postings (see
+    sessions.scoped_readonly_conn), wrapped in a row limit and projecting away LARGE_COLUMNS
+    unless the question asks for them. Only CHAT_TABLES and CHAT_TABLE_FUNCTIONS may be read,
+    the plan is checked first and the query is interrupted after `timeout` seconds. Returns
+    (DataFrame, truncated) where `truncated` means more rows were available. Raises
+    QueryRejected when a guardrail trips.
+    """
+    import pandas as pd
+
+    sql = _strip_sql(sql)
+    check_schema_qualifiers(sql)
+    conn = scoped_readonly_conn(session_id)
+    deadline = time.monotonic() + timeout
+    denied = []
+    conn.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_HANDLER_OPS)
+    conn.execute(_TABLE_FUNCTIONS_WARMUP).fetchall()
+    schema_names = {name for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master UNION SELECT name FROM sqlite_temp_master")}
+    conn.set_authorizer(_authorizer(denied, schema_names))
+    try:
+        columns = [desc[0] for desc in conn.execute(f"SELECT * FROM ({sql}) LIMIT 0").description]
+        keep = columns
+        if not _WANTS_TEXT_RE.search(question):
+            keep = [column for column in columns if column.lower() not in LARGE_COLUMNS] or columns
+        if keep != columns and len(set(columns)) == len(columns):
+            projection = ", ".join('"' + column.replace('"', '""') + '"' for column in keep)
+        else:
+            projection = "*"
+        bounded_sql = f"SELECT {projection} FROM ({sql}) LIMIT {int(max_rows) + 1}"
+        check_query_plan(get_plan_conn(), bounded_sql)
+        cur = conn.execute(bounded_sql)
+        rows = cur.fetchmany(max_rows + 1)
+    except sqlite3.DatabaseError as e:
+        if denied:
+            raise QueryRejected(f"the query may only read the {', '.join(sorted(CHAT_TABLES))} tables "
+                                f"(and {'/'.join(sorted(CHAT_TABLE_FUNCTIONS))}), not {denied[0]}") from e
+        if "interrupted" in str(e):
+            raise QueryRejected(f"the query ran longer than {timeout:g}s and was stopped") from e
+        raise
+    finally:
+        conn.set_authorizer(None)
+        conn.set_progress_handler(None, 0)
+        conn.rollback()
+    df = pd.DataFrame(rows[:max_rows], columns=[desc[0] for desc in cur.description])
+    return df, len(rows) > max_rows
+
+
+def scalar_answer(df):
+    """A direct answer for empty or single-value results, or None if they need summarizing."""
+    if df.empty:
+        return "No matching job postings were found."
+    if df.shape == (1, 1):
+        column, value = df.columns[0], df.iat[0, 0]
+        if value is None:
+            return "No matching job postings were found."
+        if isinstance(value, float):
+            value = f"{value:,.2f}".rstrip("0").rstrip(".")
+        label = column.replace("_", " ")
+        if re.fullmatch(r"[A-Za-z ]+", label):
+            return f"{label[0].upper()}{label[1:]}: {value}."
+        return f"The answer is {value}."
+    return None
+
+
+def _cell(value):
+    if isinstance(value, str) and len(value) > MAX_CELL_CHARS:
+        return value[:MAX_CELL_CHARS] + "…"
+    return value
+
+
+def result_digest(df, truncated=False, token_budget=CHAT_SUMMARY_TOKEN_BUDGET) -> str:
+    """
+    Describe a query result for the summarization prompt within `token_budget`: as many rows
+    as fit (long cells clipped), and when rows are left out, per-column aggregates over the
+    whole result so the answer can still speak to all of it.
+    """
+    records = [{key: _cell(value) for key, value in record.items()}
+               for record in json.loads(df.to_json(orient="records"))]
+    shown, used = [], 0
+    for record in records:
+        line = json.dumps(record, ensure_ascii=False)
+        if shown and used + estimate_tokens(line) > token_budget * 3 // 4:
+            break
+        shown.append(line)
+        used += estimate_tokens(line)
+
+    total = f"at least {len(df)}" if truncated else str(len(df))
+    parts = [f"The query returned {total} rows; "
+             f"{'all' if len(shown) == len(df) else f'the first {len(shown)}'} are shown as JSON:",
+             "[" + ",\n".join(shown) + "]"]
+    if len(shown) < len(df):
+        parts.append("Aggregates over all returned rows:")
+        for column in df.columns:
+            series = df[column]
+            if series.dtype.kind in "if":
+                parts.append(f"- {column}: min {series.min()}, max {series.max()}, "
+                             f"mean {series.mean():.2f}, sum {series.sum()}")
+            else:
+                counts = series.astype(str).map(_cell).value_counts().head(TOP_VALUES)
+                values = ", ".join(f"{value} ({count})" for value, count in counts.items())
+                parts.append(f"- {column}: {series.nunique()} distinct; most common: {values}")
+    digest = "\n".join(parts)
+    # Aggregate lines for very wide results can still overrun; clip as a last resort.
+    return digest[:token_budget * 4]
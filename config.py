@@ -0,0 +1,36 @@
+import os
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _streamlit_secrets(import_streamlit: bool):
+    # Only pull in Streamlit when we're already running under it, or when a required
+    # setting can't be found anywhere else.
+    if "streamlit" not in sys.modules and not import_streamlit:
+        return None
+    try:
+        import streamlit as st
+        return st.secrets
+    except Exception:
+        return None
+
+
+def get_setting(name: str, default=None):
+    """
+    Look `name` up in the environment (including .env), then in Streamlit secrets.
+    Settings with a default only consult Streamlit secrets inside a Streamlit process, so
+    the API server and scripts never import Streamlit just to read configuration.
+    """
+    value = os.environ.get(name)
+    if value is not None:
+        return value
+    secrets = _streamlit_secrets(import_streamlit=default is None)
+    if secrets is not None:
+        try:
+            return secrets[name]
+        except Exception:
+            pass
+    return default
@@ -0,0 +1,304 @@
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+from config import get_setting
+
+# Persistent job store. Every thread (Streamlit session, API worker, fetch/LLM pool) gets its
+# own connection to the same on-disk database; WAL lets readers run while one thread writes.
+DB_PATH = get_setting("SKILLFINDER_DB", os.path.join(os.getcwd(), "skillfinder.db"))
+BUSY_TIMEOUT_MS = 30000
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_title TEXT,
+        company TEXT,
+        location TEXT,
+        job_url TEXT,
+        job_description TEXT,
+        experience_level TEXT,
+        remote TEXT,
+        benefits TEXT,
+        easy_apply INTEGER,
+        date_posted TEXT,
+        sortby TEXT,
+        extracted_hard_skills TEXT,
+        extracted_soft_skills TEXT,
+        hard_skills_count INTEGER,
+        soft_skills_count INTEGER
+    )
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_job_url ON jobs(job_url)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_company ON jobs(company)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_location ON jobs(location)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_date_posted ON jobs(date_posted)",
+    # Normalized skills: one row per distinct skill name, one job_skills row per (job, kind, skill).
+    # The JSON columns on jobs are kept for display; aggregation reads these tables.
+    """
+    CREATE TABLE IF NOT EXISTS skills (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS job_skills (
+        job_id INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+        kind TEXT NOT NULL CHECK (kind IN ('hard', 'soft')),
+        skill_id INTEGER NOT NULL REFERENCES skills(id),
+        PRIMARY KEY (job_id, kind, skill_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_job_skills_kind_skill ON job_skills(kind, skill_id)",
+    # Postings with a given skill, whatever its kind (chat SQL joining skills -> job_skills -> jobs).
+    "CREATE INDEX IF NOT EXISTS idx_job_skills_skill_job ON job_skills(skill_id, job_id)",
+    # Per-search skill rollups, kept current by the triggers below; see rollups.py.
+    """
+    CREATE TABLE IF NOT EXISTS searches (
+        id INTEGER PRIMARY KEY,
+        search_key TEXT NOT NULL UNIQUE,
+        filters TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS search_jobs (
+        search_id INTEGER NOT NULL REFERENCES searches(id) ON DELETE CASCADE,
+        job_id INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+        PRIMARY KEY (search_id, job_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_search_jobs_job ON search_jobs(job_id)",
+    """
+    CREATE TABLE IF NOT EXISTS search_skill_counts (
+        search_id INTEGER NOT NULL REFERENCES searches(id) ON DELETE CASCADE,
+        kind TEXT NOT NULL,
+        skill_id INTEGER NOT NULL REFERENCES skills(id),
+        frequency INTEGER NOT NULL,
+        PRIMARY KEY (search_id, kind, skill_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_search_skill_counts_top ON search_skill_counts(search_id, kind, frequency)",
+    # A job joining a search adds its skills to that search's counts; leaving retracts them.
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_search_jobs_insert AFTER INSERT ON search_jobs BEGIN
+        INSERT INTO search_skill_counts (search_id, kind, skill_id, frequency)
+        SELECT NEW.search_id, kind, skill_id, 1 FROM job_skills WHERE job_id = NEW.job_id
+        ON CONFLICT (search_id, kind, skill_id) DO UPDATE SET frequency = frequency + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_search_jobs_delete AFTER DELETE ON search_jobs BEGIN
+        UPDATE search_skill_counts SET frequency = frequency - 1
+        WHERE search_id = OLD.search_id
+          AND (kind, skill_id) IN (SELECT kind, skill_id FROM job_skills WHERE job_id = OLD.job_id);
+        DELETE FROM search_skill_counts WHERE search_id = OLD.search_id AND frequency <= 0;
+    END
+    """,
+    # (Re-)extracting a job rewrites its job_skills rows, which updates every search holding it.
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_job_skills_insert AFTER INSERT ON job_skills BEGIN
+        INSERT INTO search_skill_counts (search_id, kind, skill_id, frequency)
+        SELECT search_id, NEW.kind, NEW.skill_id, 1 FROM search_jobs WHERE job_id = NEW.job_id
+        ON CONFLICT (search_id, kind, skill_id) DO UPDATE SET frequency = frequency + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_job_skills_delete AFTER DELETE ON job_skills BEGIN
+        UPDATE search_skill_counts SET frequency = frequency - 1
+        WHERE kind = OLD.kind AND skill_id = OLD.skill_id
+          AND search_id IN (SELECT search_id FROM search_jobs WHERE job_id = OLD.job_id);
+        DELETE FROM search_skill_counts
+        WHERE kind = OLD.kind AND skill_id = OLD.skill_id AND frequency <= 0
+          AND search_id IN (SELECT search_id FROM search_jobs WHERE job_id = OLD.job_id);
+    END
+    """,
+    # Foreign keys are not enforced on our connections, so cascade job removal by hand.
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_delete AFTER DELETE ON jobs BEGIN
+        DELETE FROM job_skills WHERE job_id = OLD.id;
+        DELETE FROM search_jobs WHERE job_id = OLD.id;
+    END
+    """,
+    # Searches refreshed in the background on an interval; see scheduler.py.
+    """
+    CREATE TABLE IF NOT EXISTS saved_searches (
+        id INTEGER PRIMARY KEY,
+        search_id INTEGER NOT NULL UNIQUE REFERENCES searches(id) ON DELETE CASCADE,
+        params TEXT NOT NULL,
+        interval_seconds INTEGER NOT NULL,
+        next_run_at REAL NOT NULL,
+        last_run_at REAL,
+        last_status TEXT,
+        last_error TEXT,
+        last_jobs INTEGER,
+        created_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_saved_searches_next_run ON saved_searches(next_run_at)",
+    # Extracted skills keyed by hash(description, prompt version, model); see cache.py.
+    """
+    CREATE TABLE IF NOT EXISTS skill_cache (
+        key TEXT PRIMARY KEY,
+        skills TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        last_used REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_skill_cache_last_used ON skill_cache(last_used)",
+    # Which postings each pipeline run (and so each UI session) stored; see sessions.py.
+    """
+    CREATE TABLE IF NOT EXISTS runs (
+        id TEXT PRIMARY KEY,
+        session_id TEXT NOT NULL,
+        search_id INTEGER REFERENCES searches(id),
+        created_at REAL NOT NULL,
+        last_active REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_runs_session ON runs(session_id)",
+    "CREATE INDEX IF NOT EXISTS idx_runs_last_active ON runs(last_active)",
+    """
+    CREATE TABLE IF NOT EXISTS run_jobs (
+        run_id TEXT NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+        job_id INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+        PRIMARY KEY (run_id, job_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_run_jobs_job ON run_jobs(job_id)",
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_delete_runs AFTER DELETE ON jobs BEGIN
+        DELETE FROM run_jobs WHERE job_id = OLD.id;
+    END
+    """,
+    # Generated chat SQL keyed by normalized question + schema fingerprint; see cache.py.
+    """
+    CREATE TABLE IF NOT EXISTS sql_plan_cache (
+        key TEXT PRIMARY KEY,
+        question TEXT NOT NULL,
+        sql TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        last_used REAL NOT NULL,
+        hits INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_sql_plan_cache_last_used ON sql_plan_cache(last_used)",
+    # Shared token-bucket state for LLM quotas; see ratelimit.py.
+    """
+    CREATE TABLE IF NOT EXISTS rate_limits (
+        name TEXT PRIMARY KEY,
+        request_tokens REAL NOT NULL,
+        llm_tokens REAL NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    """,
+]
+
+_local = threading.local()
+_connections = {}
+_pool_lock = threading.Lock()
+_schema_ready = False
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    return conn
+
+
+def create_schema(conn: sqlite3.Connection):
+    for statement in SCHEMA:
+        conn.execute(statement)
+    backfill_job_skills(conn)
+    conn.commit()
+
+
+def backfill_job_skills(conn: sqlite3.Connection):
+    # Rows extracted before job_skills existed only have the JSON columns; normalize them once.
+    for kind, column in (("hard", "extracted_hard_skills"), ("soft", "extracted_soft_skills")):
+        pending = f"""
+            SELECT jobs.id AS job_id, LOWER(TRIM(skill.value)) AS name
+            FROM jobs, json_each(jobs.{column}) AS skill
+            WHERE json_valid(jobs.{column}) AND TRIM(skill.value) != ''
+              AND NOT EXISTS (SELECT 1 FROM job_skills
+                              WHERE job_skills.job_id = jobs.id AND job_skills.kind = '{kind}')
+        """
+        conn.execute(f"INSERT OR IGNORE INTO skills (name) SELECT DISTINCT name FROM ({pending})")
+        conn.execute(f"""
+            INSERT OR IGNORE INTO job_skills (job_id, kind, skill_id)
+            SELECT pending.job_id, '{kind}', skills.id
+            FROM ({pending}) AS pending JOIN skills ON skills.name = pending.name
+        """)
+
+
+def _connect_readonly(path: str) -> sqlite3.Connection:
+    # Opened read-only at the file level and with query_only, so nothing run here can write.
+    # Percent-encoded by as_uri(), so a "#", "?" or "%" in the path can't cut it short.
+    uri = Path(path).absolute().as_uri() + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+    conn.execute("PRAGMA query_only=ON")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    return conn
+
+
+def _prune_dead_threads():
+    # Streamlit reruns and executor pools come and go; close connections whose thread is gone.
+    for key, (thread, conn) in list(_connections.items()):
+        if not thread.is_alive():
+            del _connections[key]
+            conn.close()
+
+
+def _thread_conn(kind: str, opener) -> sqlite3.Connection:
+    global _schema_ready
+    thread = threading.current_thread()
+    key = (id(thread), kind)
+    conn = getattr(_local, kind, None)
+    if conn is None or _connections.get(key, (None, None))[1] is not conn:
+        conn = opener(DB_PATH)
+        with _pool_lock:
+            _prune_dead_threads()
+            if not _schema_ready:
+                create_schema(conn)
+                _schema_ready = True
+            _connections[key] = (thread, conn)
+        setattr(_local, kind, conn)
+    return conn
+
+
+def get_conn() -> sqlite3.Connection:
+    """Return this thread's connection to the job store, opening it (and the schema) on first use."""
+    return _thread_conn("conn", _connect)
+
+
+def get_readonly_conn() -> sqlite3.Connection:
+    """
+    Return this thread's read-only connection, for running SQL we didn't write (chat queries).
+    It is separate from get_conn(), so interrupting or rolling it back never touches app writes.
+    """
+    get_conn()  # makes sure the database file and schema exist
+    return _thread_conn("readonly_conn", _connect_readonly)
+
+
+def get_plan_conn() -> sqlite3.Connection:
+    """
+    Return this thread's read-only connection for EXPLAIN QUERY PLAN of chat SQL. It is never
+    session-scoped (see sessions.py), so plans show joins over the shared tables rather than
+    the views that scope them.
+    """
+    get_conn()
+    return _thread_conn("plan_conn", _connect_readonly)
+
+
+def close_all():
+    global _schema_ready
+    with _pool_lock:
+        for _, conn in _connections.values():
+            conn.close()
+        _connections.clear()
+        _schema_ready = False
@@ -2,7 +2,11 @@ import streamlit as st
 import base64
 import math
 from streamlit_chat import message
-from backend import run_pipeline, answer_user_question
+from backend import run_pipeline, search_figures, answer_user_question
+from sessions import new_session_id
+from config import get_setting
+from metrics import snapshot, run_report
+from scheduler import save_search, start_scheduler
 
 def img_to_base64(image_path):
     """Convert an image file to a base64 string."""
@@ -61,6 +65,18 @@ st.sidebar.markdown(
 # - **Interactive Chat:** Ask questions and get instant insights about your query!
 )
 
+@st.cache_resource
+def background_refresher():
+    # Once per Streamlit process: refreshes saved searches so "Show Saved Results" stays current.
+    if get_setting("SCHEDULER_ENABLED", "1") == "1":
+        start_scheduler()
+    return True
+
+background_refresher()
+
+# Per-run stage timings and counters under the charts (see metrics.py); SHOW_RUN_REPORT=0 hides them.
+SHOW_RUN_REPORT = get_setting("SHOW_RUN_REPORT", "1") == "1"
+
 # --- MAIN APP ---
 if "conversation_history" not in st.session_state:
     st.session_state.conversation_history = [
@@ -68,6 +84,9 @@ if "conversation_history" not in st.session_state:
     ]
 if "pipeline_ran" not in st.session_state:
     st.session_state.pipeline_ran = False
+# Tags this browser session's runs so the chat only answers about its own results.
+if "session_id" not in st.session_state:
+    st.session_state.session_id = new_session_id()
 
 st.title("SkillFinder🔭")
 st.markdown("<br><br>", unsafe_allow_html=True)
@@ -99,17 +118,45 @@ with st.expander("Advanced Filters"):
         "Disability insurance"
     ]
     benefits = st.multiselect("Benefits", options=benefits_options)
-
-if st.button("Run Pipeline"):
+    extraction_options = {"Gemini (LLM)": "llm", "Hybrid (local first)": "hybrid", "Local only (offline)": "local"}
+    extraction_mode = st.selectbox("Skill Extraction", options=list(extraction_options))
+    incremental = st.checkbox("Only fetch new postings", help="Stop at the first results page with nothing new; "
+                              "works best sorted by Date Posted.")
+
+run_col, saved_col, schedule_col = st.columns([1, 1.3, 2.7])
+if saved_col.button("Show Saved Results"):
+    # Charts from earlier runs of the same search, without scraping or calling Gemini.
+    fig_hard, fig_soft = search_figures(
+        keywords, location, experience_level, remote, date_posted, easy_apply, benefits,
+        session_id=st.session_state.session_id
+    )
+    st.session_state.fig_hard = fig_hard
+    st.session_state.fig_soft = fig_soft
+    st.session_state.pipeline_ran = True
+
+if schedule_col.button("Refresh Daily"):
+    # Re-crawled in the background; "Show Saved Results" then answers instantly.
+    save_search({
+        "keywords": keywords, "location": location, "pages_to_scrape": math.ceil(jobs_to_analyze / 10),
+        "experience_level": experience_level, "remote": remote, "sortby": sortby, "date_posted": date_posted,
+        "easy_apply": easy_apply, "benefits": benefits, "extraction_mode": extraction_options[extraction_mode],
+    })
+    st.success("Saved. This search will be refreshed in the background every day.")
+
+if run_col.button("Run Pipeline"):
     with st.spinner("Running pipeline..."):
         # Each page contains 10 jobs. Calculate pages accordingly.
         pages_to_scrape = math.ceil(jobs_to_analyze / 10)
+        metrics_before = snapshot()
         fig_hard, fig_soft = run_pipeline(
             keywords, location, pages_to_scrape,
-            experience_level, remote, sortby, date_posted, easy_apply, benefits
+            experience_level, remote, sortby, date_posted, easy_apply, benefits,
+            extraction_mode=extraction_options[extraction_mode],
+            session_id=st.session_state.session_id, incremental=incremental
         )
         st.session_state.fig_hard = fig_hard
         st.session_state.fig_soft = fig_soft
+        st.session_state.run_report = run_report(metrics_before)
         st.session_state.pipeline_ran = True
 
 if st.session_state.get("pipeline_ran"):
@@ -121,6 +168,14 @@ if st.session_state.get("pipeline_ran"):
     else:
         st.error("No jobs were found (or an error occurred during scraping). Try adjusting your filters or check the logs.")
 
+    report = st.session_state.get("run_report")
+    if report and SHOW_RUN_REPORT:
+        with st.expander("Run Report", expanded=False):
+            # Counted process-wide, so a background refresh running at the same time shows up here too.
+            st.table([{"stage": stage, "calls": row["calls"], "seconds": row["seconds"]}
+                      for stage, row in sorted(report["stages"].items(), key=lambda item: -item[1]["seconds"])])
+            st.table([{"metric": name, "value": value} for name, value in sorted(report["counters"].items())])
+
 
 st.markdown("---")
 
@@ -138,7 +193,8 @@ with st.expander("Interactive Chat with SkillFinder🔭", expanded=True):
             st.session_state.conversation_history.append({"role": "user", "content": user_msg})
             with st.spinner("Processing..."):
                 answer, _ = answer_user_question(
-                    user_msg, conversation_history=st.session_state.conversation_history
+                    user_msg, conversation_history=st.session_state.conversation_history,
+                    session_id=st.session_state.session_id
                 )
             st.session_state.conversation_history.append({"role": "assistant", "content": answer})
             if "chat_input" in st.session_state:
@@ -0,0 +1,219 @@
+from config import get_setting
+from metrics import inc
+
+# Listing and job pages are large, and all we read from them is the job cards and the one
+# description div. The parsers here only build what those need:
+#   "lxml"     - libxml2 tree + XPath for just the card/description nodes (needs lxml)
+#   "strainer" - BeautifulSoup with a SoupStrainer, so only the wanted subtrees are built
+#   "bs4"      - the original full html.parser tree
+# "auto" picks lxml when it is installed. Any page the selected parser fails on is parsed
+# again with "bs4". See benchmarks/bench_parse.py.
+HTML_PARSERS = ("auto", "lxml", "strainer", "bs4")
+HTML_PARSER = get_setting("HTML_PARSER", "auto")
+
+CARD_CLASS = "job-search-card"
+DESCRIPTION_CLASS = "show-more-less-html__markup"
+# BeautifulSoup's get_text() leaves these out; the lxml parser must too.
+_SKIPPED_TEXT_TAGS = {"script", "style", "template"}
+
+_lxml_available = None
+
+
+def lxml_available() -> bool:
+    global _lxml_available
+    if _lxml_available is None:
+        try:
+            import lxml.html  # noqa: F401
+            _lxml_available = True
+        except ImportError:
+            _lxml_available = False
+    return _lxml_available
+
+
+def resolve_parser(parser=None) -> str:
+    parser = parser or HTML_PARSER
+    if parser not in HTML_PARSERS:
+        raise ValueError(f"Unknown HTML parser {parser!r}; expected one of {', '.join(HTML_PARSERS)}")
+    if parser == "auto":
+        return "lxml" if lxml_available() else "strainer"
+    if parser == "lxml" and not lxml_available():
+        return "strainer"
+    return parser
+
+
+# --- BeautifulSoup ---------------------------------------------------------------------
+
+def parse_job_card(card) -> dict:
+    # — URL & Title
+    link = card.select_one("a.base-card__full-link")
+    # Tracking query params (refId, trackingId, position...) change on every listing; drop them
+    # so the same posting always maps to the same job_url.
+    job_url = link["href"].split("?")[0] if link and link.has_attr("href") else None
+
+    title_tag = card.select_one("h3.base-search-card__title")
+    title = title_tag.get_text(strip=True) if title_tag else (
+        link.select_one("span.sr-only").get_text(strip=True)
+        if link and link.select_one("span.sr-only")
+        else "No title"
+    )
+
+    # — Company
+    company_tag = card.select_one("h4.base-search-card__subtitle a")
+    company = company_tag.get_text(strip=True) if company_tag else "No company"
+
+    # — Location
+    loc_tag = card.select_one("span.job-search-card__location")
+    location = loc_tag.get_text(strip=True) if loc_tag else "No location"
+
+    # — Posted Date (optional)
+    date_tag = card.select_one("time.job-search-card__listdate")
+    date_posted = date_tag["datetime"] if date_tag and date_tag.has_attr("datetime") else None
+
+    return {
+        "title":       title,
+        "company":     company,
+        "location":    location,
+        "url":         job_url,
+        "date_posted": date_posted,
+        "description": "",
+    }
+
+
+def _class_matcher(cls: str):
+    # While parsing, the strainer sees the raw class attribute, so match on its tokens.
+    def matches(value):
+        if not value:
+            return False
+        return cls in (value.split() if isinstance(value, str) else value)
+    return matches
+
+
+def _soup(content: bytes, strain_class=None):
+    from bs4 import BeautifulSoup, SoupStrainer
+    parse_only = SoupStrainer("div", class_=_class_matcher(strain_class)) if strain_class else None
+    return BeautifulSoup(content, "html.parser", parse_only=parse_only)
+
+
+def _bs4_listing(content: bytes, strained: bool) -> list:
+    soup = _soup(content, CARD_CLASS if strained else None)
+    return [parse_job_card(card) for card in soup.find_all("div", class_=CARD_CLASS)]
+
+
+def _bs4_description(content: bytes, strained: bool):
+    soup = _soup(content, DESCRIPTION_CLASS if strained else None)
+    description_div = soup.find("div", class_=DESCRIPTION_CLASS)
+    return description_div.get_text(strip=True).replace("\n", " ") if description_div else None
+
+
+# --- lxml ------------------------------------------------------------------------------
+
+def _has_class(tag: str, cls: str) -> str:
+    return f"{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]"
+
+
+_CARD_XPATH = "//" + _has_class("div", CARD_CLASS)
+_DESCRIPTION_XPATH = "//" + _has_class("div", DESCRIPTION_CLASS)
+_LINK_XPATH = ".//" + _has_class("a", "base-card__full-link")
+_TITLE_XPATH = ".//" + _has_class("h3", "base-search-card__title")
+_SR_ONLY_XPATH = ".//" + _has_class("span", "sr-only")
+_COMPANY_XPATH = ".//" + _has_class("h4", "base-search-card__subtitle") + "//a"
+_LOCATION_XPATH = ".//" + _has_class("span", "job-search-card__location")
+_DATE_XPATH = ".//" + _has_class("time", "job-search-card__listdate")
+
+
+def _strings(node):
+    # Text nodes in document order, like BeautifulSoup's: no comments, scripts or styles.
+    if not isinstance(node.tag, str) or node.tag in _SKIPPED_TEXT_TAGS:
+        return
+    if node.text:
+        yield node.text
+    for child in node:
+        yield from _strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def _text(node) -> str:
+    # Same as BeautifulSoup's get_text(strip=True).
+    return "".join(text.strip() for text in _strings(node) if text.strip())
+
+
+def _first(node, xpath):
+    found = node.xpath(xpath)
+    return found[0] if found else None
+
+
+def _lxml_tree(content: bytes):
+    import lxml.html
+    # Listing fragments carry no charset; they are UTF-8. Anything else goes to the bs4 path.
+    return lxml.html.document_fromstring(content.decode("utf-8"))
+
+
+def _lxml_card(card) -> dict:
+    link = _first(card, _LINK_XPATH)
+    href = link.get("href") if link is not None else None
+    job_url = href.split("?")[0] if href is not None else None
+
+    title_tag = _first(card, _TITLE_XPATH)
+    sr_only = _first(link, _SR_ONLY_XPATH) if link is not None else None
+    title = _text(title_tag) if title_tag is not None else (_text(sr_only) if sr_only is not None else "No title")
+    company_tag = _first(card, _COMPANY_XPATH)
+    loc_tag = _first(card, _LOCATION_XPATH)
+    date_tag = _first(card, _DATE_XPATH)
+    return {
+        "title":       title,
+        "company":     _text(company_tag) if company_tag is not None else "No company",
+        "location":    _text(loc_tag) if loc_tag is not None else "No location",
+        "url":         job_url,
+        "date_posted": date_tag.get("datetime") if date_tag is not None else None,
+        "description": "",
+    }
+
+
+def _lxml_listing(content: bytes) -> list:
+    return [_lxml_card(card) for card in _lxml_tree(content).xpath(_CARD_XPATH)]
+
+
+def _lxml_description(content: bytes):
+    description_div = _first(_lxml_tree(content), _DESCRIPTION_XPATH)
+    return _text(description_div).replace("\n", " ") if description_div is not None else None
+
+
+# --- Entry points ----------------------------------------------------------------------
+
+_LISTING_PARSERS = {
+    "lxml": _lxml_listing,
+    "strainer": lambda content: _bs4_listing(content, strained=True),
+    "bs4": lambda content: _bs4_listing(content, strained=False),
+}
+_DESCRIPTION_PARSERS = {
+    "lxml": _lxml_description,
+    "strainer": lambda content: _bs4_description(content, strained=True),
+    "bs4": lambda content: _bs4_description(content, strained=False),
+}
+
+
+def _parse(parsers: dict, content: bytes, parser):
+    parser = resolve_parser(parser)
+    if parser == "bs4":
+        return parsers["bs4"](content)
+    try:
+        return parsers[parser](content)
+    except Exception as e:
+        print(f"{parser} parser failed ({e!r}); falling back to html.parser")
+        inc("skillfinder_parse_failures_total", parser=parser)
+        return parsers["bs4"](content)
+
+
+def parse_listing_page(content: bytes, parser=None) -> list:
+    """The job cards of a listing page, as parse_job_card dicts."""
+    if not content:
+        return []
+    return _parse(_LISTING_PARSERS, content, parser)
+
+
+def parse_job_description(content: bytes, parser=None):
+    """The description text of a job page, or None if the page has no description div."""
+    if not content:
+        return None
+    return _parse(_DESCRIPTION_PARSERS, content, parser)
@@ -0,0 +1,219 @@
+import re
+
+from cache import is_standalone_question
+from sessions import scoped_readonly_conn
+
+# Deterministic answers for the analytics questions people ask most, so they never wait on
+# Gemini. Each intent is a pattern over the lower-cased question, a prepared query and an
+# answer template; anything that doesn't match falls through to the LLM path. Queries run on
+# the caller's session-scoped read-only connection, so they only count that session's postings.
+
+DEFAULT_TOP_N = 10
+MAX_TOP_N = 50
+MAX_LISTED_JOBS = 10
+
+_NUMBER_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+                 "eight": 8, "nine": 9, "ten": 10, "fifteen": 15, "twenty": 20}
+_N = r"(?:(?P<n>\d+|" + "|".join(_NUMBER_WORDS) + r")\s+)?"
+_JOBS = r"(?:jobs?|postings?|listings?|positions?|roles?|openings?|ads?)"
+_MENTION = r"(?:mentions?|requires?|needs?|asks? for|lists?|includes?|wants?|uses?|looks? for)"
+
+_TOP_SKILLS_RE = re.compile(
+    r"\b(?:top|most (?:common|popular|frequent|requested|wanted|in[- ]demand)|best)\s+" + _N +
+    r"(?:(?P<kind>hard|technical|soft)\s+)?skills?\b"
+    r"|\bwhat (?:are the )?(?:(?P<kind2>hard|technical|soft)\s+)?skills? (?:are )?(?:most|in (?:most )?demand)"
+)
+_BY_COMPANY_RE = re.compile(
+    r"\b(?:top\s+" + _N + r"companies|which compan(?:y|ies)\b.*\b(?:most|hiring)"
+    r"|(?:jobs?|postings?|count|number of " + _JOBS + r") (?:by|per) company|companies with the most)"
+)
+_BY_LOCATION_RE = re.compile(
+    r"\b(?:top\s+" + _N + r"(?:locations|cities|places)|(?:which|what) (?:locations?|cities|city|places?)\b.*\bmost"
+    r"|(?:jobs?|postings?|count|number of " + _JOBS + r") (?:by|per) (?:location|city))"
+)
+_REMOTE_SHARE_RE = re.compile(
+    r"\b(?:(?:what|which) (?:share|percentage|percent|proportion|fraction|portion)\b.*\bremote"
+    r"|how many\b.*\bremote|remote (?:share|percentage|ratio))"
+)
+_SKILL_COUNT_RE = re.compile(r"\bhow many " + _JOBS + r"\s+" + _MENTION + r"\s+(?P<skill>.+)$")
+_SKILL_LIST_RE = re.compile(r"\b(?:which|what|list|show(?: me)?) " + _JOBS + r"\s+(?:that\s+)?" + _MENTION +
+                            r"\s+(?P<skill>.+)$")
+_TOTAL_JOBS_RE = re.compile(r"\bhow many " + _JOBS + r"\b(?: (?:are there|do (?:we|you) have|are stored|in total"
+                            r"|in the database|did (?:we|you) (?:find|scrape)))?$")
+
+_SKILL_NOISE_RE = re.compile(r"^(?:the |a |an |skill |skills )+|(?: skills?| experience| knowledge| in total"
+                             r"| at all)+$")
+
+# Qualifiers ("top skills in Boston", "companies hiring for data roles") narrow the question
+# beyond what the prepared queries answer, so such questions go to the LLM instead.
+_QUALIFIER_RE = re.compile(r"\b(?:for|in|at|from|with|among|within|between|except|excluding|without|where|"
+                           r"when|since|before|after|during|last|past|recent|recently|today|week|month|located|based|near|"
+                           r"than|only|remote|onsite|hybrid|senior|junior|entry)\b")
+# "python or java", "sql but not python": the prepared queries only count a single skill.
+_SKILL_CONNECTIVE_RE = re.compile(r"\b(?:and|or|but|not|nor|versus|vs)\b|,|\s[&+/]\s")
+_BENIGN_PHRASES_RE = re.compile(r"\bin[- ](?:most )?demand\b|\bin (?:the|our|my) (?:database|data|db)\b|"
+                                r"\bin total\b|\bwith the most\b|\bat all\b")
+
+NO_DATA_ANSWER = "I don't have any job postings stored yet. Run the pipeline first, then ask again."
+
+
+def _top_n(match) -> int:
+    value = match.groupdict().get("n")
+    if not value:
+        return DEFAULT_TOP_N
+    n = int(value) if value.isdigit() else _NUMBER_WORDS[value]
+    return max(1, min(n, MAX_TOP_N))
+
+
+def _query(conn, sql: str, params=()):
+    cur = conn.execute(sql, params)
+    return [desc[0] for desc in cur.description], cur.fetchall()
+
+
+def _frame(columns, rows):
+    import pandas as pd
+    return pd.DataFrame(rows, columns=columns)
+
+
+def _total_jobs(conn) -> int:
+    return conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+
+def _ranked(rows, unit="jobs") -> str:
+    return ", ".join(f"{name} ({count} {unit if count != 1 else unit.rstrip('s')})" for name, count in rows)
+
+
+def _top_skills(conn, match):
+    kind = match.group("kind") or match.group("kind2")
+    kinds = ["soft"] if kind == "soft" else ["hard"] if kind in ("hard", "technical") else ["hard", "soft"]
+    n = _top_n(match)
+    frames, sentences = [], []
+    for kind in kinds:
+        columns, rows = _query(conn, """
+            SELECT skills.name AS skill, COUNT(*) AS jobs
+            FROM job_skills JOIN skills ON skills.id = job_skills.skill_id
+            WHERE job_skills.kind = ?
+            GROUP BY job_skills.skill_id
+            ORDER BY jobs DESC, skills.name
+            LIMIT ?
+        """, (kind, n))
+        if rows:
+            sentences.append(f"Top {kind} skills: {_ranked(rows)}.")
+            frames.extend((kind, skill, count) for skill, count in rows)
+    if not sentences:
+        return NO_DATA_ANSWER, None
+    return " ".join(sentences), _frame(["kind", "skill", "jobs"], frames)
+
+
+def _grouped_counts(column: str, label: str):
+    def answer(conn, match):
+        n = _top_n(match)
+        columns, rows = _query(conn, f"""
+            SELECT {column}, COUNT(*) AS jobs FROM jobs
+            WHERE {column} IS NOT NULL AND {column} != ''
+            GROUP BY {column} ORDER BY jobs DESC, {column} LIMIT ?
+        """, (n,))
+        if not rows:
+            return NO_DATA_ANSWER, None
+        return f"{label} with the most postings: {_ranked(rows, 'postings')}.", _frame(columns, rows)
+    return answer
+
+
+def _remote_share(conn, match):
+    # Postings carry no work type of their own: jobs.remote is the filter of the search that
+    # found them. Only a remote-only search (or a "Remote" location) says a posting is remote.
+    columns, rows = _query(conn, """
+        SELECT SUM(remote = 'Remote' OR location LIKE '%remote%') AS remote_jobs, COUNT(*) AS jobs FROM jobs
+    """)
+    remote_jobs, total = rows[0]
+    if not total:
+        return NO_DATA_ANSWER, None
+    share = remote_jobs / total * 100
+    return (f"{remote_jobs} of {total} stored postings ({share:.1f}%) are remote, counting postings found by "
+            "remote-only searches or listing a remote location (LinkedIn cards don't state the work type).",
+            _frame(columns + ["remote_share"], [(remote_jobs, total, round(share, 1))]))
+
+
+def _clean_skill(match) -> str:
+    skill = match.group("skill").strip().strip("?!. ")
+    skill = _SKILL_NOISE_RE.sub("", skill).strip()
+    return "" if _SKILL_CONNECTIVE_RE.search(skill) else skill
+
+
+_SKILL_MATCH_SQL = """
+    FROM jobs
+    WHERE jobs.id IN (SELECT job_skills.job_id FROM job_skills JOIN skills ON skills.id = job_skills.skill_id
+                      WHERE skills.name = ?)
+       OR ' ' || jobs.job_description || ' ' LIKE ?
+"""
+
+
+def _skill_count(conn, match):
+    skill = _clean_skill(match)
+    if not skill:
+        return None
+    total = _total_jobs(conn)
+    if not total:
+        return NO_DATA_ANSWER, None
+    columns, rows = _query(conn, f"SELECT COUNT(*) AS jobs {_SKILL_MATCH_SQL}", (skill, f"% {skill} %"))
+    count = rows[0][0]
+    return (f"{count} of {total} stored postings ({count / total * 100:.1f}%) mention {skill}.",
+            _frame(["skill", "jobs", "total_jobs"], [(skill, count, total)]))
+
+
+def _skill_list(conn, match):
+    skill = _clean_skill(match)
+    if not skill:
+        return None
+    columns, rows = _query(conn, f"SELECT job_title, company, location, job_url {_SKILL_MATCH_SQL} "
+                                 "ORDER BY jobs.id DESC", (skill, f"% {skill} %"))
+    if not rows:
+        return (NO_DATA_ANSWER if not _total_jobs(conn) else f"None of the stored postings mention {skill}."), None
+    listed = "; ".join(f"{title} at {company} ({location})" for title, company, location, _ in rows[:MAX_LISTED_JOBS])
+    more = f" and {len(rows) - MAX_LISTED_JOBS} more" if len(rows) > MAX_LISTED_JOBS else ""
+    mention = "1 posting mentions" if len(rows) == 1 else f"{len(rows)} postings mention"
+    return f"{mention} {skill}: {listed}{more}.", _frame(columns, rows)
+
+
+def _total(conn, match):
+    total = _total_jobs(conn)
+    if not total:
+        return NO_DATA_ANSWER, None
+    return f"There are {total} job postings stored.", _frame(["jobs"], [(total,)])
+
+
+# Checked in order; the specific skill intents come before the broader count patterns.
+INTENTS = [
+    ("top_skills", _TOP_SKILLS_RE, _top_skills),
+    ("skill_count", _SKILL_COUNT_RE, _skill_count),
+    ("skill_list", _SKILL_LIST_RE, _skill_list),
+    ("remote_share", _REMOTE_SHARE_RE, _remote_share),
+    ("jobs_by_company", _BY_COMPANY_RE, _grouped_counts("company", "Companies")),
+    ("jobs_by_location", _BY_LOCATION_RE, _grouped_counts("location", "Locations")),
+    ("total_jobs", _TOTAL_JOBS_RE, _total),
+]
+
+
+def route_question(question: str, session_id=None):
+    """
+    Answer `question` locally if it matches a known analytics intent, over the postings of
+    `session_id`'s runs (all postings if None).
+    Returns (answer, dataframe, intent_name), or None to fall through to the LLM.
+    """
+    if not is_standalone_question(question):
+        return None
+    text = " ".join(question.lower().strip().rstrip("?!. ").split())
+    for name, pattern, handler in INTENTS:
+        match = pattern.search(text)
+        if match:
+            # The whole question is checked, skill included ("python in boston"); "remote" is
+            # only allowed as the subject of the remote-share intent.
+            checked = _BENIGN_PHRASES_RE.sub(" ", text)
+            if name == "remote_share":
+                checked = re.sub(r"\bremote\b", " ", checked)
+            if _QUALIFIER_RE.search(checked):
+                return None
+            routed = handler(scoped_readonly_conn(session_id), match)
+            if routed is not None:
+                return routed[0], routed[1], name
+    return None
@@ -0,0 +1,57 @@
+import threading
+import time
+
+from config import get_setting
+from ratelimit import gemini_limiter, is_quota_error, backoff_delay, GEMINI_MAX_RETRIES
+from metrics import inc, span
+
+GEMINI_MODEL = get_setting("GEMINI_MODEL", "gemini-2.0-flash")
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Build the Gemini client on first use; importing google.genai alone costs most of a second."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            from google import genai
+            _client = genai.Client(api_key=get_setting("GEM_KEY"))
+        return _client
+
+
+def set_client(client):
+    # Swap in another client (e.g. a stand-in for offline benchmarks).
+    global _client
+    with _client_lock:
+        _client = client
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough Gemini token estimate (~4 characters per token for English text).
+    return len(text) // 4 + 1
+
+
+def generate_content(prompt: str, config=None):
+    """
+    Call Gemini through the process-wide rate limiter, retrying quota errors
+    (429 / RESOURCE_EXHAUSTED) with jittered exponential backoff.
+    """
+    client = get_client()
+    prompt_tokens = estimate_tokens(prompt)
+    for attempt in range(GEMINI_MAX_RETRIES + 1):
+        try:
+            with gemini_limiter.slot(prompt_tokens):
+                with span("llm_call"):
+                    response = client.models.generate_content(model=GEMINI_MODEL, contents=prompt, config=config)
+            inc("skillfinder_llm_tokens_total", prompt_tokens, direction="prompt")
+            inc("skillfinder_llm_tokens_total", estimate_tokens(getattr(response, "text", None) or ""), direction="response")
+            return response
+        except Exception as e:
+            if attempt == GEMINI_MAX_RETRIES or not is_quota_error(e):
+                raise
+            inc("skillfinder_llm_retries_total")
+            delay = backoff_delay(attempt)
+            print(f"Gemini quota error ({e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
@@ -1,15 +1,33 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Request
+from fastapi.responses import StreamingResponse, JSONResponse, HTMLResponse, Response, PlainTextResponse
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
-import pandas as pd
-import plotly.express as px
+from typing import List, Literal, Optional
+from contextlib import asynccontextmanager
 import json
-from collections import Counter
 
 # Import shared functions from backend.py
-from backend import scrape_jobs_with_descriptions, extract_skills
-
-app = FastAPI(title="Job Helper API")
+from backend import (scrape_jobs_with_descriptions, iter_scraped_jobs, extract_skills, render_skill_figures_html,
+                     remote_mapping, DEFAULT_HEADERS)
+from pipeline_runs import submit_run, get_run
+from rollups import search_filters, search_skill_payload
+from config import get_setting
+from metrics import render_prometheus
+from scheduler import (save_search, list_saved_searches, get_saved_search, delete_saved_search, start_scheduler,
+                       stop_scheduler, DEFAULT_REFRESH_INTERVAL_SECONDS)
+
+@asynccontextmanager
+async def lifespan(app):
+    # Refresh saved searches in the background while the API is up (set SCHEDULER_ENABLED=0
+    # to run the refresher elsewhere, e.g. `python scheduler.py`).
+    enabled = get_setting("SCHEDULER_ENABLED", "1") == "1"
+    if enabled:
+        start_scheduler()
+    yield
+    if enabled:
+        stop_scheduler(wait=False)
+
+app = FastAPI(title="Job Helper API", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -28,6 +46,10 @@ class ScrapeRequest(BaseModel):
     location: str = "New York, USA"
     f_WT: str = "2"
     pages_to_scrape: int = 1
+    # Stream jobs as newline-delimited JSON (also selected by "Accept: application/x-ndjson").
+    stream: bool = False
+    # Stop paging at the first page with no new postings and reuse stored descriptions.
+    incremental: bool = False
 
 class ExtractRequest(BaseModel):
     job_description: str
@@ -35,20 +57,41 @@ class ExtractRequest(BaseModel):
 class PipelineRequest(BaseModel):
     keywords: str = "software engineer"
     location: str = "New York, USA"
-    f_WT: str = "2"
     pages_to_scrape: int = 1
+    experience_level: List[str] = []
+    remote: List[str] = []
+    sortby: str = ""
+    date_posted: str = ""
+    easy_apply: bool = False
+    benefits: List[str] = []
+    extraction_mode: Optional[Literal["llm", "local", "hybrid"]] = None
+    incremental: bool = False
+    # Legacy work-type code(s), e.g. "2" or "1,3"; used when `remote` is empty.
+    f_WT: str = "2"
+
+class SavedSearchRequest(PipelineRequest):
+    interval_seconds: int = DEFAULT_REFRESH_INTERVAL_SECONDS
+
+def remote_labels(req) -> list:
+    # Map LinkedIn work-type codes back to the labels backend filters take.
+    if getattr(req, "remote", None):
+        return req.remote
+    labels = {code: label for label, code in remote_mapping.items()}
+    return [labels[code] for code in req.f_WT.split(",") if code in labels]
 
 # ----------------------------
 # API Endpoints
 # ----------------------------
 @app.post("/scrape-jobs")
-def scrape_jobs_endpoint(req: ScrapeRequest):
-    headers = {
-        "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                       "AppleWebKit/537.36 (KHTML, like Gecko) "
-                       "Chrome/91.0.4472.124 Safari/537.36")
-    }
-    jobs = scrape_jobs_with_descriptions(req.keywords, req.location, req.f_WT, req.pages_to_scrape, headers)
+def scrape_jobs_endpoint(req: ScrapeRequest, request: Request):
+    if req.stream or "application/x-ndjson" in request.headers.get("accept", ""):
+        # One JSON object per line, written as soon as each description is fetched; nothing
+        # is accumulated server-side, so memory stays flat regardless of pages_to_scrape.
+        jobs = iter_scraped_jobs(req.keywords, req.location, req.pages_to_scrape, DEFAULT_HEADERS,
+                                 remote=remote_labels(req), incremental=req.incremental)
+        return StreamingResponse((json.dumps(job) + "\n" for job in jobs), media_type="application/x-ndjson")
+    jobs = scrape_jobs_with_descriptions(req.keywords, req.location, req.pages_to_scrape, DEFAULT_HEADERS,
+                                         remote=remote_labels(req), incremental=req.incremental)
     if not jobs:
         raise HTTPException(status_code=404, detail="No jobs found")
     return {"jobs": jobs}
@@ -58,57 +101,124 @@ def extract_skills_endpoint(req: ExtractRequest):
     skills = extract_skills(req.job_description)
     return skills
 
-@app.post("/pipeline")
+def pipeline_params(req) -> dict:
+    # stream_pipeline keyword arguments for a PipelineRequest.
+    params = {
+        "keywords": req.keywords,
+        "location": req.location,
+        "pages_to_scrape": req.pages_to_scrape,
+        "experience_level": req.experience_level,
+        "remote": remote_labels(req),
+        "sortby": req.sortby,
+        "date_posted": req.date_posted,
+        "easy_apply": req.easy_apply,
+        "benefits": req.benefits,
+        "incremental": req.incremental,
+    }
+    if req.extraction_mode:
+        params["extraction_mode"] = req.extraction_mode
+    return params
+
+@app.post("/pipeline", status_code=202)
 def pipeline_endpoint(req: PipelineRequest):
-    headers = {
-        "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                       "AppleWebKit/537.36 (KHTML, like Gecko) "
-                       "Chrome/91.0.4472.124 Safari/537.36")
+    """
+    Queue a scrape + extract run and return its ID immediately. Poll GET /pipeline/{run_id}
+    for status and the final charts, or follow GET /pipeline/{run_id}/events for progress.
+    """
+    run = submit_run(pipeline_params(req))
+    return {
+        "run_id": run.id,
+        "status": run.status,
+        "status_url": f"/pipeline/{run.id}",
+        "events_url": f"/pipeline/{run.id}/events",
     }
-    # Scrape job postings using the provided parameters
-    jobs = scrape_jobs_with_descriptions(req.keywords, req.location, req.f_WT, req.pages_to_scrape, headers)
-
-    # Extract skills for each job posting
-    for job in jobs:
-        job["extracted_skills"] = extract_skills(job["description"])
-
-    # Aggregate skills across all jobs
-    hard_skills_counter = Counter()
-    soft_skills_counter = Counter()
-    for job in jobs:
-        skills = job.get("extracted_skills", {})
-        hard_skills_counter.update(skills.get("hard_skills", []))
-        soft_skills_counter.update(skills.get("soft_skills", []))
-
-    df_hard = pd.DataFrame(hard_skills_counter.items(), columns=["Skill", "Frequency"])
-    df_soft = pd.DataFrame(soft_skills_counter.items(), columns=["Skill", "Frequency"])
-
-    df_hard_sorted = df_hard.sort_values("Frequency", ascending=False)
-    df_soft_sorted = df_soft.sort_values("Frequency", ascending=False)
-
-    fig_hard = px.bar(
-        df_hard_sorted,
-        x="Skill",
-        y="Frequency",
-        title="Top Hard Skills",
-        labels={"Skill": "Hard Skill", "Frequency": "Count"},
-        color="Frequency",
-        color_continuous_scale="Blues"
-    )
-    fig_hard.update_layout(xaxis_tickangle=-45)
-
-    fig_soft = px.bar(
-        df_soft_sorted,
-        x="Skill",
-        y="Frequency",
-        title="Top Soft Skills",
-        labels={"Skill": "Soft Skill", "Frequency": "Count"},
-        color="Frequency",
-        color_continuous_scale="Blues"
-    )
-    fig_soft.update_layout(xaxis_tickangle=-45)
-
-    html_hard = fig_hard.to_html(full_html=False, include_plotlyjs="cdn")
-    html_soft = fig_soft.to_html(full_html=False, include_plotlyjs="cdn")
-
-    return {"hard_skills_graph": html_hard, "soft_skills_graph": html_soft}
+
+def _get_run_or_404(run_id: str):
+    run = get_run(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired run")
+    return run
+
+@app.get("/pipeline/{run_id}")
+def pipeline_status_endpoint(run_id: str):
+    return _get_run_or_404(run_id).snapshot()
+
+@app.get("/pipeline/{run_id}/events")
+async def pipeline_events_endpoint(run_id: str, last_event_id: Optional[str] = Header(None)):
+    """
+    Server-Sent Events: "status", "page", "job" and "batch" events carry the run's progress
+    counters; the stream ends with "done" (top skills) or "failed" (error). Reconnecting
+    clients resume after their Last-Event-ID.
+    """
+    run = _get_run_or_404(run_id)
+    after = int(last_event_id) if last_event_id and last_event_id.isdigit() else -1
+
+    async def event_source():
+        async for event in run.stream(after):
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+    return StreamingResponse(event_source(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def _search_payload_or_404(search_id: int, limit: int) -> dict:
+    if search_filters(search_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown search")
+    return search_skill_payload(search_id, limit)
+
+@app.get("/searches/{search_id}/skills")
+def search_skills_endpoint(search_id: int, limit: int = 15, if_none_match: Optional[str] = Header(None)):
+    """
+    Top skills of a search's rollup as compact columnar JSON
+    ({"hard_skills": {"skill": [...], "frequency": [...], "percentage": [...]}, ...}).
+    The ETag tracks the rollup, so clients can revalidate with If-None-Match and get a 304.
+    """
+    payload = _search_payload_or_404(search_id, limit)
+    headers = {"ETag": payload["etag"], "Cache-Control": "no-cache"}
+    if if_none_match == payload["etag"]:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(payload, headers=headers)
+
+@app.get("/searches/{search_id}/figures", response_class=HTMLResponse)
+def search_figures_endpoint(search_id: int, if_none_match: Optional[str] = Header(None)):
+    # Optional rendered charts; rendering is memoized per payload in backend.render_skill_figures_html.
+    payload = _search_payload_or_404(search_id, 15)
+    headers = {"ETag": payload["etag"], "Cache-Control": "no-cache"}
+    if if_none_match == payload["etag"]:
+        return Response(status_code=304, headers=headers)
+    html_hard, html_soft = render_skill_figures_html(payload)
+    return HTMLResponse(html_hard + html_soft, headers=headers)
+
+def _saved_search_or_404(saved_id: int) -> dict:
+    saved = get_saved_search(saved_id)
+    if saved is None:
+        raise HTTPException(status_code=404, detail="Unknown saved search")
+    return saved
+
+@app.post("/saved-searches", status_code=201)
+def create_saved_search_endpoint(req: SavedSearchRequest):
+    """Save a search for background refreshes every `interval_seconds`; the first one starts right away."""
+    return _saved_search_or_404(save_search(pipeline_params(req), req.interval_seconds))
+
+@app.get("/saved-searches")
+def list_saved_searches_endpoint():
+    return list_saved_searches()
+
+@app.get("/saved-searches/{saved_id}")
+def saved_search_endpoint(saved_id: int, limit: int = 15):
+    # The refresher keeps the rollup current, so this is a read of precomputed results.
+    saved = _saved_search_or_404(saved_id)
+    return {**saved, "skills": search_skill_payload(saved["search_id"], limit)}
+
+@app.delete("/saved-searches/{saved_id}", status_code=204)
+def delete_saved_search_endpoint(saved_id: int):
+    if not delete_saved_search(saved_id):
+        raise HTTPException(status_code=404, detail="Unknown saved search")
+    return Response(status_code=204)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    """Stage latencies and pipeline/chat counters for this process, in Prometheus text format."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
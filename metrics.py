@@ -0,0 +1,127 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# In-process counters and latency histograms for the pipeline and chat stages, exposed in
+# Prometheus text format at /metrics (main.py) and summarized per run in the UI (frontend.py).
+# Everything is process-local and cheap enough to record on every call.
+
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRICS = {
+    "skillfinder_stage_seconds": ("histogram", "Time spent in a pipeline or chat stage."),
+    "skillfinder_stage_errors_total": ("counter", "Stage calls that raised."),
+    "skillfinder_http_bytes_total": ("counter", "Response bytes fetched, by page kind."),
+    "skillfinder_http_errors_total": ("counter", "Fetches that failed or returned a non-200 status."),
+    "skillfinder_llm_tokens_total": ("counter", "Estimated Gemini tokens, by direction."),
+    "skillfinder_llm_retries_total": ("counter", "Gemini calls retried after a quota error."),
+    "skillfinder_llm_parse_failures_total": ("counter", "Batched Gemini responses or items dropped, by reason."),
+    "skillfinder_llm_redispatched_items_total": ("counter", "Items re-sent after a batch response lacked them."),
+    "skillfinder_cache_requests_total": ("counter", "Cache lookups, by cache and result (hit or miss)."),
+    "skillfinder_parse_failures_total": ("counter", "Pages the selected HTML parser failed on."),
+    "skillfinder_jobs_total": ("counter", "Jobs scraped, by source (fetched or stored)."),
+    "skillfinder_chat_answers_total": ("counter", "Chat answers, by path."),
+}
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+
+
+def _key(name: str, labels: dict):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name: str, value=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name: str, value: float, **labels):
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {"buckets": [0] * len(STAGE_BUCKETS), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(STAGE_BUCKETS):
+            if value <= bound:
+                histogram["buckets"][i] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+
+@contextmanager
+def span(stage: str):
+    """Time the enclosed block as `stage` in skillfinder_stage_seconds."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        inc("skillfinder_stage_errors_total", stage=stage)
+        raise
+    finally:
+        observe("skillfinder_stage_seconds", time.perf_counter() - start, stage=stage)
+
+
+def snapshot() -> dict:
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "stages": {dict(labels)["stage"]: (h["count"], h["sum"]) for (name, labels), h in _histograms.items()
+                       if name == "skillfinder_stage_seconds"},
+        }
+
+
+def run_report(since: dict) -> dict:
+    """
+    What happened since `since` (a snapshot()): per-stage calls and seconds, and counter
+    deltas. Other runs in the same process overlapping this one are included too.
+    """
+    now = snapshot()
+    stages = {}
+    for stage, (count, seconds) in now["stages"].items():
+        before_count, before_seconds = since["stages"].get(stage, (0, 0.0))
+        if count > before_count:
+            stages[stage] = {"calls": count - before_count, "seconds": round(seconds - before_seconds, 3)}
+    counters = {}
+    for (name, labels), value in now["counters"].items():
+        delta = value - since["counters"].get((name, labels), 0)
+        if delta:
+            label_text = ",".join(f"{k}={v}" for k, v in labels)
+            counters[f"{name}{{{label_text}}}" if label_text else name] = delta
+    return {"stages": stages, "counters": counters}
+
+
+def _labels(labels, extra=()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: {"buckets": list(h["buckets"]), "sum": h["sum"], "count": h["count"]}
+                      for key, h in _histograms.items()}
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "counter":
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_labels(labels)} {value}")
+            continue
+        for (metric, labels), histogram in sorted(histograms.items()):
+            if metric != name:
+                continue
+            for bound, count in zip(STAGE_BUCKETS, histogram["buckets"]):
+                lines.append(f"{name}_bucket{_labels(labels, [('le', f'{bound:g}')])} {count}")
+            lines.append(f"{name}_bucket{_labels(labels, [('le', '+Inf')])} {histogram['count']}")
+            lines.append(f"{name}_sum{_labels(labels)} {histogram['sum']:.6f}")
+            lines.append(f"{name}_count{_labels(labels)} {histogram['count']}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,163 @@
+import asyncio
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from config import get_setting
+from backend import stream_pipeline
+from rollups import get_or_create_search, search_skill_payload
+
+# Pipeline runs submitted through the API execute here, off the request path. Each run already
+# fans out to its own fetch and Gemini pools, so a handful of concurrent runs is plenty.
+PIPELINE_WORKERS = int(get_setting("PIPELINE_WORKERS", "4"))
+# Finished runs stay pollable for this long before they are dropped from memory.
+RUN_RETENTION_SECONDS = int(get_setting("RUN_RETENTION_SECONDS", "3600"))
+SSE_KEEPALIVE_SECONDS = 15
+
+_executor = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="pipeline-run")
+_runs = {}
+_runs_lock = threading.Lock()
+
+
+class PipelineRun:
+    """
+    One submitted pipeline run: its parameters, status, progress counters and an append-only
+    event log. Events are published from the worker thread and can be replayed from any
+    point (for SSE clients that reconnect with Last-Event-ID).
+    """
+
+    def __init__(self, params: dict):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.status = "queued"
+        self.progress = {
+            "pages_scraped": 0,
+            "jobs_found": 0,
+            "jobs_fetched": 0,
+            "batches_extracted": 0,
+            "jobs_extracted": 0,
+        }
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.events = []
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def publish(self, event: str, data=None, finished=False):
+        with self._lock:
+            self.events.append({
+                "id": len(self.events),
+                "event": event,
+                "data": {"status": self.status, "progress": dict(self.progress), **(data or {})},
+            })
+            if finished:
+                self.finished_at = time.time()
+            subscribers = list(self._subscribers)
+        for loop, wakeup in subscribers:
+            loop.call_soon_threadsafe(wakeup.set)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "run_id": self.id,
+                "status": self.status,
+                "params": self.params,
+                "progress": dict(self.progress),
+                "result": self.result,
+                "error": self.error,
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+            }
+
+    async def stream(self, last_event_id=-1):
+        """
+        Yield events after `last_event_id` as they are published, until the run finishes.
+        Yields None every SSE_KEEPALIVE_SECONDS without news so callers can send a keep-alive.
+        """
+        wakeup = asyncio.Event()
+        subscriber = (asyncio.get_running_loop(), wakeup)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        try:
+            while True:
+                wakeup.clear()
+                with self._lock:
+                    pending = self.events[last_event_id + 1:]
+                    finished = self.finished_at is not None
+                for event in pending:
+                    last_event_id = event["id"]
+                    yield event
+                if finished:
+                    return
+                try:
+                    await asyncio.wait_for(wakeup.wait(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+    def _on_progress(self, event, item):
+        with self._lock:
+            if event == "page":
+                self.progress["pages_scraped"] += 1
+                self.progress["jobs_found"] += len(item)
+            else:
+                self.progress["jobs_fetched"] += 1
+        self.publish(event)
+
+    def execute(self):
+        self.status = "running"
+        self.publish("status")
+        try:
+            job_ids = []
+            for batch in stream_pipeline(**self.params, on_progress=self._on_progress):
+                job_ids.extend(job["db_id"] for job in batch)
+                with self._lock:
+                    self.progress["batches_extracted"] += 1
+                    self.progress["jobs_extracted"] += len(batch)
+                self.publish("batch")
+
+            params = self.params
+            search_id = get_or_create_search(params["keywords"], params["location"],
+                                             params.get("experience_level", []), params.get("remote", []),
+                                             params.get("date_posted", ""), params.get("easy_apply", False),
+                                             params.get("benefits", []))
+            # Compact chart data for the whole search; fetch /searches/{id}/figures for rendered charts.
+            self.result = {"jobs": len(job_ids), "search_id": search_id,
+                           "skills": search_skill_payload(search_id)}
+            self.status = "done"
+            self.publish("done", self.result, finished=True)
+        except Exception as e:
+            traceback.print_exc()
+            self.error = str(e)
+            self.status = "failed"
+            self.publish("failed", {"error": self.error}, finished=True)
+
+
+def _prune_runs():
+    cutoff = time.time() - RUN_RETENTION_SECONDS
+    with _runs_lock:
+        for run_id, run in list(_runs.items()):
+            if run.finished_at is not None and run.finished_at < cutoff:
+                del _runs[run_id]
+
+
+def submit_run(params: dict) -> PipelineRun:
+    """Queue a pipeline run (stream_pipeline keyword arguments) and return it immediately."""
+    _prune_runs()
+    run = PipelineRun(params)
+    with _runs_lock:
+        _runs[run.id] = run
+    run.publish("status")
+    _executor.submit(run.execute)
+    return run
+
+
+def get_run(run_id: str):
+    with _runs_lock:
+        return _runs.get(run_id)
@@ -0,0 +1,128 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from config import get_setting
+from db import get_conn
+
+# Defaults match the gemini-2.0-flash free tier; override per deployment.
+GEMINI_RPM = int(get_setting("GEMINI_RPM", "15"))
+GEMINI_TPM = int(get_setting("GEMINI_TPM", "1000000"))
+GEMINI_MAX_IN_FLIGHT = int(get_setting("GEMINI_MAX_IN_FLIGHT", "4"))
+GEMINI_MAX_RETRIES = int(get_setting("GEMINI_MAX_RETRIES", "5"))
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+# Politeness towards scraped hosts for background refreshes: spacing between request starts
+# and concurrent requests, per host, across all refresh workers in this process.
+SCRAPE_HOST_MIN_INTERVAL = float(get_setting("SCRAPE_HOST_MIN_INTERVAL", "1.0"))
+SCRAPE_HOST_MAX_IN_FLIGHT = int(get_setting("SCRAPE_HOST_MAX_IN_FLIGHT", "2"))
+
+
+class TokenBucketLimiter:
+    """
+    Requests/min and tokens/min token buckets whose state lives in the job store, so every
+    thread and every process sharing SKILLFINDER_DB (Streamlit and the FastAPI server) draws
+    from the same quota. `max_in_flight` additionally caps concurrent calls in this process.
+    """
+
+    def __init__(self, name, requests_per_minute, tokens_per_minute, max_in_flight):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+
+    def _try_take(self, tokens: int) -> float:
+        # Returns 0 if the request may go now, otherwise how long to wait before retrying.
+        tokens = min(tokens, self.tokens_per_minute)
+        conn = get_conn()
+        conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = conn.execute(
+                "SELECT request_tokens, llm_tokens, updated_at FROM rate_limits WHERE name = ?",
+                (self.name,),
+            ).fetchone()
+            if row is None:
+                request_tokens, llm_tokens = float(self.requests_per_minute), float(self.tokens_per_minute)
+            else:
+                elapsed = max(0.0, now - row[2])
+                request_tokens = min(self.requests_per_minute, row[0] + elapsed * self.requests_per_minute / 60)
+                llm_tokens = min(self.tokens_per_minute, row[1] + elapsed * self.tokens_per_minute / 60)
+
+            if request_tokens >= 1 and llm_tokens >= tokens:
+                request_tokens -= 1
+                llm_tokens -= tokens
+                wait = 0.0
+            else:
+                wait = max((1 - request_tokens) * 60 / self.requests_per_minute,
+                           (tokens - llm_tokens) * 60 / self.tokens_per_minute)
+            conn.execute("""
+                INSERT INTO rate_limits (name, request_tokens, llm_tokens, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET request_tokens = excluded.request_tokens,
+                    llm_tokens = excluded.llm_tokens, updated_at = excluded.updated_at
+            """, (self.name, request_tokens, llm_tokens, now))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return wait
+
+    def acquire(self, tokens: int):
+        while True:
+            wait = self._try_take(tokens)
+            if wait <= 0:
+                return
+            # Other callers may refill/consume meanwhile, so re-check at least once a second.
+            time.sleep(min(wait, 1.0) + random.uniform(0, 0.05))
+
+    @contextmanager
+    def slot(self, tokens: int):
+        with self._in_flight:
+            self.acquire(tokens)
+            yield
+
+
+class HostPoliteness:
+    """
+    Per-host request spacing and concurrency cap. Unlike TokenBucketLimiter this is
+    in-process only: it is checked on every HTTP request, too often for a DB round trip.
+    """
+
+    def __init__(self, min_interval, max_in_flight):
+        self.min_interval = min_interval
+        self.max_in_flight = max_in_flight
+        self._lock = threading.Lock()
+        self._next_start = {}
+        self._in_flight = {}
+
+    @contextmanager
+    def slot(self, host: str):
+        with self._lock:
+            semaphore = self._in_flight.setdefault(host, threading.BoundedSemaphore(self.max_in_flight))
+        with semaphore:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start.get(host, now))
+                self._next_start[host] = start + self.min_interval
+            if start > now:
+                time.sleep(start - now)
+            yield
+
+
+def is_quota_error(error: Exception) -> bool:
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    if code in (429, 503):
+        return True
+    message = str(error)
+    return "RESOURCE_EXHAUSTED" in message or "429" in message
+
+
+def backoff_delay(attempt: int) -> float:
+    # "Full jitter" exponential backoff.
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+gemini_limiter = TokenBucketLimiter("gemini", GEMINI_RPM, GEMINI_TPM, GEMINI_MAX_IN_FLIGHT)
+scrape_politeness = HostPoliteness(SCRAPE_HOST_MIN_INTERVAL, SCRAPE_HOST_MAX_IN_FLIGHT)
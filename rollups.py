@@ -0,0 +1,109 @@
+import hashlib
+import json
+import time
+
+from db import get_conn
+
+def _search_filters(keywords, location, experience_level=(), remote=(), date_posted="",
+                    easy_apply=False, benefits=()) -> dict:
+    # Only filters that change which postings come back: runs that differ just in sort order
+    # or page count share (and keep growing) one rollup.
+    return {
+        "keywords": " ".join(keywords.split()).lower(),
+        "location": " ".join(location.split()).lower(),
+        "experience_level": sorted(experience_level or []),
+        "remote": sorted(remote or []),
+        "date_posted": "" if date_posted == "Any time" else (date_posted or ""),
+        "easy_apply": bool(easy_apply),
+        "benefits": sorted(benefits or []),
+    }
+
+
+def search_key(*args, **kwargs) -> str:
+    return json.dumps(_search_filters(*args, **kwargs), sort_keys=True)
+
+
+def get_or_create_search(*args, **kwargs) -> int:
+    """Return the id of the search for these filters, registering it on first use."""
+    filters = _search_filters(*args, **kwargs)
+    key = json.dumps(filters, sort_keys=True)
+    now = time.time()
+    conn = get_conn()
+    conn.execute("""
+        INSERT INTO searches (search_key, filters, created_at, updated_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT(search_key) DO UPDATE SET updated_at = excluded.updated_at
+    """, (key, json.dumps(filters), now, now))
+    conn.commit()
+    return conn.execute("SELECT id FROM searches WHERE search_key = ?", (key,)).fetchone()[0]
+
+
+def find_search(*args, **kwargs):
+    row = get_conn().execute("SELECT id FROM searches WHERE search_key = ?",
+                             (search_key(*args, **kwargs),)).fetchone()
+    return row[0] if row else None
+
+
+def add_search_jobs(search_id: int, job_ids):
+    """
+    Record that `job_ids` were returned by the search. The triggers on search_jobs and
+    job_skills (see db.py) fold their skills into the search's counts, now and whenever a
+    job is re-extracted or removed.
+    """
+    conn = get_conn()
+    conn.executemany("INSERT OR IGNORE INTO search_jobs (search_id, job_id) VALUES (?, ?)",
+                     [(search_id, job_id) for job_id in job_ids])
+    conn.commit()
+
+
+def remove_search_jobs(search_id: int, job_ids):
+    conn = get_conn()
+    conn.executemany("DELETE FROM search_jobs WHERE search_id = ? AND job_id = ?",
+                     [(search_id, job_id) for job_id in job_ids])
+    conn.commit()
+
+
+def search_job_count(search_id: int) -> int:
+    return get_conn().execute("SELECT COUNT(*) FROM search_jobs WHERE search_id = ?",
+                              (search_id,)).fetchone()[0]
+
+
+def search_top_skills(search_id: int, kind: str, limit=15) -> list:
+    """Return [(skill, job_count)] for the search's `limit` most frequent skills of `kind`."""
+    return get_conn().execute("""
+        SELECT skills.name, counts.frequency
+        FROM search_skill_counts AS counts JOIN skills ON skills.id = counts.skill_id
+        WHERE counts.search_id = ? AND counts.kind = ?
+        ORDER BY counts.frequency DESC, skills.name
+        LIMIT ?
+    """, (search_id, kind, limit)).fetchall()
+
+
+def search_filters(search_id: int):
+    row = get_conn().execute("SELECT filters FROM searches WHERE id = ?", (search_id,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def _skill_columns(rows) -> dict:
+    total = sum(frequency for _, frequency in rows)
+    return {
+        "skill": [skill for skill, _ in rows],
+        "frequency": [frequency for _, frequency in rows],
+        "percentage": [round(frequency / total * 100, 1) for _, frequency in rows],
+    }
+
+
+def search_skill_payload(search_id: int, limit=15) -> dict:
+    """
+    The data behind a search's charts in compact columnar form: for each kind, parallel
+    skill/frequency/percentage arrays sorted by frequency (percentages are of the top `limit`).
+    Includes an `etag` that changes whenever the rollup's top skills or job count do.
+    """
+    payload = {
+        "search_id": search_id,
+        "jobs": search_job_count(search_id),
+        "hard_skills": _skill_columns(search_top_skills(search_id, "hard", limit)),
+        "soft_skills": _skill_columns(search_top_skills(search_id, "soft", limit)),
+    }
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+    payload["etag"] = f'"{digest[:32]}"'
+    return payload
@@ -0,0 +1,200 @@
+import json
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from config import get_setting
+from db import get_conn
+from backend import stream_pipeline, get_http_session, render_skill_figures
+from rollups import get_or_create_search, search_skill_payload
+
+# Saved searches are re-crawled in the background so asking for them again is a rollup read
+# instead of a full scrape. Refreshes crawl incrementally and through the polite HTTP session
+# (see ratelimit.HostPoliteness), so a few workers are enough.
+REFRESH_WORKERS = int(get_setting("REFRESH_WORKERS", "2"))
+REFRESH_POLL_SECONDS = int(get_setting("REFRESH_POLL_SECONDS", "30"))
+DEFAULT_REFRESH_INTERVAL_SECONDS = 24 * 3600
+MIN_REFRESH_INTERVAL_SECONDS = 15 * 60
+
+# stream_pipeline arguments a saved search keeps; everything else is fixed for refreshes.
+SAVED_SEARCH_PARAMS = ("keywords", "location", "pages_to_scrape", "experience_level", "remote", "sortby",
+                       "date_posted", "easy_apply", "benefits", "extraction_mode")
+
+_executor = None
+_thread = None
+_stop = threading.Event()
+_running = set()
+_lock = threading.Lock()
+
+
+def save_search(params: dict, interval_seconds=DEFAULT_REFRESH_INTERVAL_SECONDS) -> int:
+    """
+    Save a search (stream_pipeline keyword arguments) for background refreshes every
+    `interval_seconds`. Saving the same filters again updates the existing entry.
+    The first refresh is due immediately.
+    """
+    params = {name: params[name] for name in SAVED_SEARCH_PARAMS if params.get(name) is not None}
+    interval_seconds = max(int(interval_seconds), MIN_REFRESH_INTERVAL_SECONDS)
+    search_id = get_or_create_search(params["keywords"], params["location"], params.get("experience_level", []),
+                                     params.get("remote", []), params.get("date_posted", ""),
+                                     params.get("easy_apply", False), params.get("benefits", []))
+    now = time.time()
+    conn = get_conn()
+    conn.execute("""
+        INSERT INTO saved_searches (search_id, params, interval_seconds, next_run_at, created_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(search_id) DO UPDATE SET params = excluded.params,
+            interval_seconds = excluded.interval_seconds,
+            next_run_at = COALESCE(MIN(saved_searches.next_run_at,
+                                       saved_searches.last_run_at + excluded.interval_seconds),
+                                   saved_searches.next_run_at)
+    """, (search_id, json.dumps(params), interval_seconds, now, now))
+    conn.commit()
+    return conn.execute("SELECT id FROM saved_searches WHERE search_id = ?", (search_id,)).fetchone()[0]
+
+
+def _saved_search_row(row) -> dict:
+    (saved_id, search_id, params, interval_seconds, next_run_at, last_run_at, last_status, last_error,
+     last_jobs) = row
+    return {
+        "id": saved_id,
+        "search_id": search_id,
+        "params": json.loads(params),
+        "interval_seconds": interval_seconds,
+        "next_run_at": next_run_at,
+        "last_run_at": last_run_at,
+        "last_status": last_status,
+        "last_error": last_error,
+        "last_jobs": last_jobs,
+    }
+
+
+_SAVED_SEARCH_COLUMNS = ("id, search_id, params, interval_seconds, next_run_at, last_run_at, last_status, "
+                         "last_error, last_jobs")
+
+
+def list_saved_searches() -> list:
+    rows = get_conn().execute(f"SELECT {_SAVED_SEARCH_COLUMNS} FROM saved_searches ORDER BY id").fetchall()
+    return [_saved_search_row(row) for row in rows]
+
+
+def get_saved_search(saved_id: int):
+    row = get_conn().execute(f"SELECT {_SAVED_SEARCH_COLUMNS} FROM saved_searches WHERE id = ?",
+                             (saved_id,)).fetchone()
+    return _saved_search_row(row) if row else None
+
+
+def delete_saved_search(saved_id: int) -> bool:
+    # The search's rollup stays; it still backs "Show Saved Results" and /searches/{id}.
+    conn = get_conn()
+    deleted = conn.execute("DELETE FROM saved_searches WHERE id = ?", (saved_id,)).rowcount
+    conn.commit()
+    return bool(deleted)
+
+
+def refresh_saved_search(saved_id: int) -> int:
+    """Crawl a saved search incrementally, store the results and return the number of jobs seen."""
+    saved = get_saved_search(saved_id)
+    if saved is None:
+        return 0
+    params = saved["params"]
+    print(f"Refreshing saved search {saved_id}: {params['keywords']!r} in {params['location']!r}")
+    jobs, status, error = 0, "done", None
+    try:
+        for batch in stream_pipeline(**params, incremental=True, http_session=get_http_session(polite=True)):
+            jobs += len(batch)
+        payload = search_skill_payload(saved["search_id"])
+        if payload["hard_skills"]["skill"] or payload["soft_skills"]["skill"]:
+            # Warm the figure memo so the next interactive request is a cache hit.
+            render_skill_figures(payload)
+    except Exception as e:
+        traceback.print_exc()
+        status, error = "failed", str(e)
+    conn = get_conn()
+    conn.execute("UPDATE saved_searches SET last_run_at = ?, last_status = ?, last_error = ?, last_jobs = ? "
+                 "WHERE id = ?", (time.time(), status, error, jobs, saved_id))
+    conn.commit()
+    return jobs
+
+
+def _claim_due(now: float) -> list:
+    # Moving next_run_at forward is the claim, so a second scheduler process sharing the
+    # store (Streamlit and the API server) never refreshes the same search at the same time.
+    conn = get_conn()
+    due = conn.execute("SELECT id, next_run_at, interval_seconds FROM saved_searches WHERE next_run_at <= ? "
+                       "ORDER BY next_run_at", (now,)).fetchall()
+    claimed = []
+    for saved_id, next_run_at, interval_seconds in due:
+        cur = conn.execute("UPDATE saved_searches SET next_run_at = ? WHERE id = ? AND next_run_at = ?",
+                           (now + interval_seconds, saved_id, next_run_at))
+        if cur.rowcount:
+            claimed.append(saved_id)
+    conn.commit()
+    return claimed
+
+
+def _refresh_and_release(saved_id: int):
+    try:
+        refresh_saved_search(saved_id)
+    finally:
+        with _lock:
+            _running.discard(saved_id)
+
+
+def run_due_searches(now=None) -> list:
+    """Queue refreshes for every saved search that is due; returns the IDs queued."""
+    with _lock:
+        if _executor is None:
+            return []
+        queued = []
+        for saved_id in _claim_due(now or time.time()):
+            if saved_id in _running:
+                continue
+            _running.add(saved_id)
+            _executor.submit(_refresh_and_release, saved_id)
+            queued.append(saved_id)
+    return queued
+
+
+def _loop():
+    while not _stop.is_set():
+        try:
+            run_due_searches()
+        except Exception:
+            traceback.print_exc()
+        _stop.wait(REFRESH_POLL_SECONDS)
+
+
+def start_scheduler():
+    """Start the background refresher (idempotent)."""
+    global _executor, _thread
+    with _lock:
+        if _thread is not None and _thread.is_alive():
+            return
+        _stop.clear()
+        _executor = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="search-refresh")
+        _thread = threading.Thread(target=_loop, name="search-scheduler", daemon=True)
+        _thread.start()
+
+
+def stop_scheduler(wait=True):
+    global _executor, _thread
+    _stop.set()
+    with _lock:
+        executor, thread = _executor, _thread
+        _executor = _thread = None
+    if thread is not None:
+        thread.join()
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+if __name__ == "__main__":
+    # Run only the refresher, e.g. as its own process next to the UI and API.
+    start_scheduler()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stop_scheduler()
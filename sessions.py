@@ -0,0 +1,130 @@
+import re
+import threading
+import time
+import uuid
+
+from config import get_setting
+from db import get_conn, get_readonly_conn
+
+# Each UI session tags the pipeline runs it starts, and its chat only sees postings from those
+# runs. Sessions idle for longer than this lose their run records (the postings themselves
+# stay in the shared store and keep serving the cache and saved searches).
+SESSION_IDLE_SECONDS = int(get_setting("SESSION_IDLE_SECONDS", str(6 * 3600)))
+EVICT_INTERVAL_SECONDS = 60
+
+_SESSION_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+# Temp table on the read-only connection holding the scoped session's posting IDs.
+SCOPE_TABLE = "session_jobs"
+_local = threading.local()
+_evict_lock = threading.Lock()
+_last_evicted = 0.0
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+
+def _check_session_id(session_id: str) -> str:
+    # Only accept the form we hand out.
+    if not _SESSION_ID_RE.match(session_id or ""):
+        raise ValueError(f"Invalid session id {session_id!r}")
+    return session_id
+
+
+def start_run(session_id: str, search_id=None) -> str:
+    """Register a pipeline run for `session_id` and return its run ID."""
+    _check_session_id(session_id)
+    evict_idle_sessions()
+    run_id = uuid.uuid4().hex
+    now = time.time()
+    conn = get_conn()
+    conn.execute("INSERT INTO runs (id, session_id, search_id, created_at, last_active) VALUES (?, ?, ?, ?, ?)",
+                 (run_id, session_id, search_id, now, now))
+    conn.commit()
+    return run_id
+
+
+def add_run_jobs(run_id: str, job_ids):
+    conn = get_conn()
+    conn.executemany("INSERT OR IGNORE INTO run_jobs (run_id, job_id) VALUES (?, ?)",
+                     [(run_id, job_id) for job_id in job_ids])
+    conn.commit()
+
+
+def attach_search(session_id: str, search_id: int) -> str:
+    """Give `session_id` a run holding every posting already in a saved search's rollup."""
+    run_id = start_run(session_id, search_id)
+    conn = get_conn()
+    conn.execute("INSERT OR IGNORE INTO run_jobs (run_id, job_id) SELECT ?, job_id FROM search_jobs WHERE search_id = ?",
+                 (run_id, search_id))
+    conn.commit()
+    return run_id
+
+
+def touch_session(session_id: str):
+    conn = get_conn()
+    conn.execute("UPDATE runs SET last_active = ? WHERE session_id = ?", (time.time(), session_id))
+    conn.commit()
+
+
+def evict_idle_sessions(force=False) -> int:
+    """Drop run records of sessions idle for SESSION_IDLE_SECONDS; runs at most once a minute."""
+    global _last_evicted
+    with _evict_lock:
+        if not force and time.time() - _last_evicted < EVICT_INTERVAL_SECONDS:
+            return 0
+        _last_evicted = time.time()
+    conn = get_conn()
+    cutoff = time.time() - SESSION_IDLE_SECONDS
+    conn.execute("DELETE FROM run_jobs WHERE run_id IN (SELECT id FROM runs WHERE last_active < ?)", (cutoff,))
+    evicted = conn.execute("DELETE FROM runs WHERE last_active < ?", (cutoff,)).rowcount
+    conn.commit()
+    if evicted:
+        print(f"Evicted {evicted} idle pipeline runs")
+    return evicted
+
+
+def scoped_readonly_conn(session_id=None):
+    """
+    This thread's read-only connection, scoped to `session_id`: TEMP views named jobs and
+    job_skills shadow the shared tables (SQLite resolves unqualified names to temp first), so
+    unqualified queries only see postings from that session's runs. The views read the
+    session's posting IDs from a temp table refreshed on every call, never runs/run_jobs, so
+    generated SQL can be limited to jobs, skills and job_skills (chat_sql.bounded_query).
+    With session_id None the views are dropped and the whole store is visible.
+    """
+    conn = get_readonly_conn()
+    if session_id is not None:
+        _check_session_id(session_id)
+        touch_session(session_id)
+    rescope = getattr(_local, "scope", None) != (conn, session_id)
+    if not rescope and session_id is None:
+        return conn
+    conn.execute("PRAGMA query_only=OFF")  # TEMP objects only; the file itself stays read-only
+    try:
+        if rescope:
+            conn.execute("DROP VIEW IF EXISTS temp.job_skills")
+            conn.execute("DROP VIEW IF EXISTS temp.jobs")
+            if session_id is not None:
+                conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS {SCOPE_TABLE} (job_id INTEGER PRIMARY KEY)")
+                conn.execute(f"""
+                    CREATE TEMP VIEW jobs AS SELECT * FROM main.jobs
+                    WHERE id IN (SELECT job_id FROM temp.{SCOPE_TABLE})
+                """)
+                conn.execute(f"""
+                    CREATE TEMP VIEW job_skills AS SELECT * FROM main.job_skills
+                    WHERE job_id IN (SELECT job_id FROM temp.{SCOPE_TABLE})
+                """)
+        if session_id is not None:
+            # Runs stored since the last call are picked up here.
+            conn.execute(f"DELETE FROM temp.{SCOPE_TABLE}")
+            conn.execute(f"""
+                INSERT OR IGNORE INTO temp.{SCOPE_TABLE} (job_id)
+                SELECT run_jobs.job_id FROM main.runs JOIN main.run_jobs ON run_jobs.run_id = runs.id
+                WHERE runs.session_id = ?
+            """, (session_id,))
+            conn.commit()
+    finally:
+        conn.execute("PRAGMA query_only=ON")
+    _local.scope = (conn, session_id)
+    return conn
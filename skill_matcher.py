@@ -0,0 +1,188 @@
+import json
+import re
+import threading
+import time
+from collections import Counter, deque
+
+from config import get_setting
+from db import get_conn
+
+# Extraction modes: "llm" sends every description to Gemini, "local" only uses the matcher,
+# "hybrid" uses the matcher and falls back to Gemini where it finds too few hard skills.
+EXTRACTION_MODES = ("llm", "local", "hybrid")
+EXTRACTION_MODE = get_setting("EXTRACTION_MODE", "llm")
+LOCAL_MIN_HARD_SKILLS = int(get_setting("LOCAL_MIN_HARD_SKILLS", "3"))
+# A skill must have been extracted from at least this many postings to enter the vocabulary.
+VOCAB_MIN_POSTINGS = 2
+VOCAB_MAX_TERM_TOKENS = 5
+VOCAB_REFRESH_SECONDS = 600
+
+# Cold-start vocabulary so local/offline mode finds the obvious skills on an empty store.
+SEED_SKILLS = {
+    "hard": [
+        "python", "sql", "java", "scala", "c++", "c#", "javascript", "typescript", "golang",
+        "excel", "tableau", "power bi", "looker", "pandas", "numpy", "scikit-learn", "pytorch",
+        "tensorflow", "spark", "hadoop", "airflow", "dbt", "snowflake", "databricks", "aws",
+        "azure", "gcp", "docker", "kubernetes", "git", "linux", "machine learning",
+        "deep learning", "statistics", "a/b testing", "nlp", "etl", "data visualization",
+    ],
+    "soft": [
+        "communication", "teamwork", "collaboration", "leadership", "problem solving",
+        "critical thinking", "attention to detail", "time management", "adaptability",
+        "creativity", "stakeholder management",
+    ],
+}
+
+# Skill names that are also everyday words or letters. "go" is left to the LLM (the seeds have
+# "golang"); "r" and "c" only count as the capital letter on its own, not in "R&D", "C-level"
+# or "grade c".
+AMBIGUOUS_SKILLS = {"go"}
+CASE_GATED_SKILLS = {"r": "R", "c": "C"}
+# A match directly followed by one of these tokens is part of a longer name ("c" in "C++").
+_NAME_CONTINUATIONS = {"+", "#"}
+
+# Letters/digits form words; every other non-space character is its own token, so "C++",
+# "c ++" and "C + +" all normalize to the same token sequence.
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[^\sa-z0-9]")
+_ANY_CASE_TOKEN_RE = re.compile(_TOKEN_RE.pattern, re.I)
+
+
+class SkillMatcher:
+    """
+    Aho-Corasick automaton over token sequences. Matching is a single pass over the
+    description's tokens, so cost is independent of vocabulary size and matches always
+    fall on whole-token boundaries. A match followed by "+" or "#" is dropped, and
+    CASE_GATED_SKILLS only count in their own spelling.
+    """
+
+    def __init__(self, vocabulary: dict, stop_words=frozenset()):
+        self.stop_words = stop_words
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self._skills = []
+        self._gated = {}  # skill index -> the only spelling that counts
+        for skill, kind in vocabulary.items():
+            if skill.lower() in AMBIGUOUS_SKILLS:
+                continue
+            tokens = self.tokenize(skill)
+            if tokens and self._add(tokens, len(self._skills)):
+                if skill.lower() in CASE_GATED_SKILLS:
+                    self._gated[len(self._skills)] = CASE_GATED_SKILLS[skill.lower()]
+                self._skills.append((skill, kind))
+        self._build_failure_links()
+
+    def tokenize(self, text: str) -> list:
+        return [token for token in _TOKEN_RE.findall(text.lower()) if token not in self.stop_words]
+
+    def _spans(self, text: str) -> list:
+        # The tokenize() tokens as matches on the original text, for checking their spelling.
+        return [m for m in _ANY_CASE_TOKEN_RE.finditer(text) if m.group().lower() not in self.stop_words]
+
+    def _add(self, tokens, skill_index) -> bool:
+        # Returns False when another spelling already normalized to the same tokens.
+        node = 0
+        for token in tokens:
+            nxt = self._goto[node].get(token)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][token] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        if self._out[node]:
+            return False
+        self._out[node].append(skill_index)
+        return True
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(token, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def match(self, text: str) -> dict:
+        goto, fail, out, gated = self._goto, self._fail, self._out, self._gated
+        tokens = self.tokenize(text)
+        spans = None
+        found = set()
+        node = 0
+        last = len(tokens) - 1
+        for i, token in enumerate(tokens):
+            while node and token not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(token, 0)
+            if not out[node] or (i < last and tokens[i + 1] in _NAME_CONTINUATIONS):
+                continue
+            for index in out[node]:
+                if index in gated:
+                    if spans is None:
+                        spans = self._spans(text)
+                    if len(spans) != len(tokens) or not _standalone(text, spans[i], gated[index]):
+                        continue
+                found.add(index)
+        skills = {"hard_skills": [], "soft_skills": []}
+        for index in sorted(found):
+            skill, kind = self._skills[index]
+            skills[f"{kind}_skills"].append(skill)
+        return skills
+
+    def match_many(self, texts) -> list:
+        return [self.match(text) for text in texts]
+
+    def __len__(self):
+        return len(self._skills)
+
+
+def _standalone(text: str, m, spelling: str) -> bool:
+    # Spelled exactly so, and not glued into "R&D", "C-level" or a dotted abbreviation.
+    start, end = m.span()
+    if m.group() != spelling or text[start - 1:start] in ("&", "-", "."):
+        return False
+    after = text[end:end + 2]
+    return not (after[:1] in ("&", "-") or after[:1] == "." and after[1:].isalnum())
+
+
+def load_vocabulary(min_postings=VOCAB_MIN_POSTINGS) -> dict:
+    """Seed vocabulary plus every skill the LLM extracted from at least `min_postings` stored postings."""
+    counts = {"hard": Counter(), "soft": Counter()}
+    rows = get_conn().execute("""
+        SELECT extracted_hard_skills, extracted_soft_skills FROM jobs
+        WHERE extracted_hard_skills IS NOT NULL
+    """).fetchall()
+    for hard, soft in rows:
+        counts["hard"].update(set(json.loads(hard or "[]")))
+        counts["soft"].update(set(json.loads(soft or "[]")))
+
+    vocabulary = {}
+    for kind in ("soft", "hard"):
+        for skill in SEED_SKILLS[kind]:
+            vocabulary[skill] = kind
+    for skill in set(counts["hard"]) | set(counts["soft"]):
+        hard, soft = counts["hard"][skill], counts["soft"][skill]
+        if max(hard, soft) < min_postings or len(skill.split()) > VOCAB_MAX_TERM_TOKENS:
+            continue
+        vocabulary[skill.lower()] = "hard" if hard >= soft else "soft"
+    return vocabulary
+
+
+_matcher = None
+_matcher_built_at = 0.0
+_matcher_lock = threading.Lock()
+
+
+def get_skill_matcher(stop_words=frozenset()) -> SkillMatcher:
+    # Rebuilt periodically so newly extracted skills flow into the local vocabulary.
+    global _matcher, _matcher_built_at
+    with _matcher_lock:
+        if _matcher is None or time.time() - _matcher_built_at > VOCAB_REFRESH_SECONDS:
+            _matcher = SkillMatcher(load_vocabulary(), stop_words)
+            _matcher_built_at = time.time()
+        return _matcher
@@ -0,0 +1,111 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+# Fast replacement for word_tokenize + stopwords filtering. It reproduces the Treebank
+# tokenizer's splitting rules with one compiled regex and skips Punkt sentence splitting:
+# a period followed by whitespace (or the end of the text) is split off unless it follows a
+# known abbreviation. The output is near-identical, not identical: Punkt's statistical calls
+# (an abbreviation before a capitalised word, "1,000." before a lowercase one) are not
+# reproduced. See benchmarks/bench_textnorm.py and the README.
+
+NLTK_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nltk_data")
+STOPWORDS_PATH = os.path.join(NLTK_DATA, "corpora", "stopwords", "english")
+ABBREVIATIONS_PATH = os.path.join(NLTK_DATA, "tokenizers", "punkt_tab", "english", "abbrev_types.txt")
+# Batches at least this large are worth shipping to worker processes.
+PROCESS_POOL_MIN_TEXTS = 500
+
+
+def _load_stop_words() -> frozenset:
+    if os.path.exists(STOPWORDS_PATH):
+        with open(STOPWORDS_PATH, encoding="utf-8") as f:
+            return frozenset(line.strip() for line in f if line.strip())
+    from nltk.corpus import stopwords
+    return frozenset(stopwords.words("english"))
+
+
+def _load_abbreviations() -> frozenset:
+    if not os.path.exists(ABBREVIATIONS_PATH):
+        return frozenset()
+    with open(ABBREVIATIONS_PATH, encoding="utf-8") as f:
+        return frozenset(line.strip() for line in f if line.strip())
+
+
+STOP_WORDS = _load_stop_words()
+# Punkt's English abbreviations (ph.d, u.s, inc, ...): a period after these is not a sentence end.
+ABBREVIATIONS = _load_abbreviations()
+
+# Characters that are always tokens of their own (Treebank splits these out everywhere),
+# including curly quotes, guillemets and figure/en/em dashes.
+_SPLIT = r";@#$%&?!()\[\]{}<>*«»“”‘’„\u2012-\u2015"
+# What may follow a clitic ('s, n't) for Treebank to split it off: anything it pads with a space.
+# A closing quote in between only counts if a space or punctuation padded before quotes follows.
+_PADDED_BEFORE_QUOTES = r"[;@#$%&?!\u2012-\u2015«“‘„`]|[,:](?!\d)|\.(?:\.|$|\s)"
+# Punkt only breaks a sentence before these, and Treebank splits the period ending the text.
+# Before "?" or "!" the break comes after them, so the period stays in the word ("e.g.!").
+_PERIOD_BREAK = r"$|[\s)\";}\]*:@'({\[.]|[\]\)}>\"'»”’]+\s*$"
+_BOUNDARY = (
+    r"(?=$|\s|[" + _SPLIT + r"`]|[,:](?!\d)|\.(?:" + _PERIOD_BREAK + r")|--|'(?= |"
+    + _PADDED_BEFORE_QUOTES + r"))"
+)
+_CLITIC_REST = r"(?:[sSmMdD]|ll|LL|re|RE|ve|VE)"
+# A quote opening a word ('Agile', '90s) is split off unless what follows reads as a clitic.
+_LEADING_QUOTE = r"(?<!\w)'(?=\w)(?!(?i:re|ve|ll|m|t|s|d|n)\b)"
+_WORD_PART = (
+    rf"[^\s{_SPLIT}`\"',:.nN-]+"             # runs of ordinary word characters
+    rf"|n(?!'t{_BOUNDARY})|N(?!'T{_BOUNDARY})"  # stop before "n't" contractions
+    r"|-(?!-)"                               # ... and before "--"
+    r"|[,:](?=\d)"                           # 1,000 / 10:30 stay whole
+    rf"|\.(?!{_PERIOD_BREAK})"                  # e.g / 3.5 / skills.We
+    rf"|(?!{_LEADING_QUOTE})'(?=\w|\.(?!{_PERIOD_BREAK}))(?!{_CLITIC_REST}{_BOUNDARY})"  # O'Brien, Master's/PhD
+)
+_TOKEN_RE = re.compile(
+    rf"(?:'{_CLITIC_REST}|n't|N'T){_BOUNDARY}"   # contractions
+    r"|\b(?i:can(?=not\b)|gon(?=na\b)|got(?=ta\b)|wan(?=na\s)|gim(?=me\b)|lem(?=me\b)|d(?='ye\b)|more(?='n\b))"
+    rf"|{_LEADING_QUOTE}"
+    r"|\.{2,}|--|''|`+"
+    rf"|(?:{_WORD_PART})+"
+    r"|\S",
+)
+_OPEN_QUOTE_RE = re.compile(r'^"|(?<=[\s(\[{<])"|(?<=[ (\[{<])\'\'')
+
+
+def tokenize(text: str) -> list:
+    # Treebank quote convention: an opening " or '' becomes `` and any other " becomes ''.
+    if '"' in text or "''" in text:
+        text = _OPEN_QUOTE_RE.sub(" `` ", text).replace('"', " '' ")
+    tokens = _TOKEN_RE.findall(text)
+    if "." in tokens:
+        tokens = _reattach_abbreviation_periods(tokens)
+    return tokens
+
+
+def _reattach_abbreviation_periods(tokens: list) -> list:
+    # Punkt doesn't end a sentence after a known abbreviation, also as the last part of a
+    # hyphenated word ("Non-U.S."), so Treebank leaves it whole unless it ends the text.
+    merged = []
+    last = len(tokens) - 1
+    for i, token in enumerate(tokens):
+        if token == "." and merged and i < last and merged[-1].lower().split("-")[-1] in ABBREVIATIONS:
+            merged[-1] += "."
+        else:
+            merged.append(token)
+    return merged
+
+
+def normalize(text: str) -> str:
+    """Drop English stopwords from `text`, returning the remaining tokens joined by spaces."""
+    return " ".join([token for token in tokenize(text) if token.lower() not in STOP_WORDS])
+
+
+def normalize_many(texts, processes=None) -> list:
+    """
+    Normalize many descriptions at once, preserving order. With `processes` set and a
+    large enough batch, the work is spread over a process pool.
+    """
+    texts = list(texts)
+    if processes and processes > 1 and len(texts) >= PROCESS_POOL_MIN_TEXTS:
+        chunksize = max(1, len(texts) // (processes * 4))
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            return list(pool.map(normalize, texts, chunksize=chunksize))
+    return [normalize(text) for text in texts]